@@ -0,0 +1,156 @@
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from logic import *
+from preprocess import entails
+from puzzle import ConstructKnowledge
+
+# Random 3-SAT clause-to-variable ratio near the satisfiability threshold
+PHASE_TRANSITION = 4.26
+
+# Workload sizes
+SAT_VARIABLES = [10, 13, 16]
+PIGEONHOLE_HOLES = [2, 3]
+INHABITANTS = [4, 6, 8]
+
+# Symbols to split on for the process-pool backend
+PARALLEL_SPLIT = 3
+
+SEED = 0
+
+
+def main():
+    if len(sys.argv) not in [1, 2]:
+        sys.exit("Usage: python benchmark.py [output.json]")
+
+    results = [
+        measure(name, backend, knowledge, query)
+        for name, knowledge, query in workloads(random.Random(SEED))
+        for backend in BACKENDS
+    ]
+
+    output = json.dumps(results, indent=2)
+    if len(sys.argv) == 2:
+        with open(sys.argv[1], "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+def random_3sat(variables, rng, ratio=PHASE_TRANSITION):
+    """
+    Returns a random 3-CNF knowledge base over `variables` symbols with
+    `ratio` clauses per variable, and a random literal to query.
+    """
+    symbols = [Symbol(f"x{i}") for i in range(variables)]
+
+    def literal():
+        symbol = rng.choice(symbols)
+        return symbol if rng.random() < 0.5 else Not(symbol)
+
+    knowledge = And()
+    for _ in range(round(variables * ratio)):
+        knowledge.add(Or(literal(), literal(), literal()))
+    return knowledge, literal()
+
+
+def pigeonhole(holes):
+    """
+    Returns the unsatisfiable knowledge base stating that `holes` + 1
+    pigeons each sit in one of `holes` holes with no two sharing a hole.
+    """
+    pigeons = holes + 1
+    sits = [[Symbol(f"p{p}h{h}") for h in range(holes)]
+            for p in range(pigeons)]
+
+    knowledge = And()
+    for p in range(pigeons):
+        knowledge.add(Or(*sits[p]))
+    for h in range(holes):
+        for p in range(pigeons):
+            for q in range(p + 1, pigeons):
+                knowledge.add(Or(Not(sits[p][h]), Not(sits[q][h])))
+    return knowledge, sits[0][0]
+
+
+def knights(inhabitants, rng):
+    """
+    Returns a knights-and-knaves puzzle where each of `inhabitants`
+    people makes a random claim about another, and the query whether
+    the first person is a knight.
+    """
+    box = [[Symbol(f"{i} is a Knight"), Symbol(f"{i} is a Knave")]
+           for i in range(inhabitants)]
+    word = []
+    for i in range(inhabitants):
+        j = rng.choice([k for k in range(inhabitants) if k != i])
+        claims = [
+            box[j][0],
+            box[j][1],
+            Or(And(box[i][0], box[j][0]), And(box[i][1], box[j][1])),
+            Or(And(box[i][0], box[j][1]), And(box[i][1], box[j][0]))
+        ]
+        word.append(rng.choice(claims))
+    return ConstructKnowledge(inhabitants, box, word), box[0][0]
+
+
+def workloads(rng):
+    """Yields (name, knowledge, query) for every generated workload."""
+    for n in SAT_VARIABLES:
+        yield (f"3sat-{n}", *random_3sat(n, rng))
+    for n in PIGEONHOLE_HOLES:
+        yield (f"pigeonhole-{n}", *pigeonhole(n))
+    for n in INHABITANTS:
+        yield (f"knights-{n}", *knights(n, rng))
+
+
+# Each backend checks entailment and records its work in `stats`
+BACKENDS = {
+    "enumerate": lambda knowledge, query, stats: model_check(
+        knowledge, query, stats=stats
+    ),
+    "parallel": lambda knowledge, query, stats: model_check(
+        knowledge, query, split=PARALLEL_SPLIT, stats=stats
+    ),
+    "preprocess": lambda knowledge, query, stats: entails(
+        knowledge, query, report=stats, stats=stats
+    )
+}
+
+
+def measure(name, backend, knowledge, query):
+    """
+    Runs one backend on one workload, returning its entailment result,
+    wall-clock time, models evaluated and peak memory allocated, along
+    with anything else the backend reported.
+    Memory is traced in a second run so tracing does not skew timing,
+    and only covers the calling process.
+    """
+    check = BACKENDS[backend]
+    stats = dict()
+    start = time.perf_counter()
+    entailed = check(knowledge, query, stats)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    check(knowledge, query, dict())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "workload": name,
+        "backend": backend,
+        "symbols": len(set.union(knowledge.symbols(), query.symbols())),
+        "entailed": entailed,
+        "seconds": seconds,
+        "models": stats.pop("models", 0),
+        "peak_bytes": peak,
+        **stats
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import re
+
+from logic import *
+
+# Token kinds produced by `tokenize`
+NAME = "name"
+LPAREN = "("
+RPAREN = ")"
+NOT = "not"
+AND = "and"
+OR = "or"
+IMPLIES = "implies"
+IFF = "iff"
+
+# Operator spellings and the token kind each one stands for
+OPERATORS = {
+    "<=>": IFF, "<->": IFF,
+    "=>": IMPLIES, "->": IMPLIES,
+    "¬": NOT, "~": NOT, "!": NOT,
+    "∧": AND, "&": AND,
+    "∨": OR, "|": OR,
+    "(": LPAREN, ")": RPAREN
+}
+
+# Longest spellings first so "<=>" wins over "=>"
+TOKEN = re.compile("|".join(
+    re.escape(spelling) for spelling in sorted(OPERATORS, key=len, reverse=True)
+))
+
+# Binding strength and right-associativity of binary operators
+PRECEDENCE = {
+    IFF: (1, True),
+    IMPLIES: (2, True),
+    OR: (3, False),
+    AND: (4, False)
+}
+
+
+def tokenize(text):
+    """
+    Yields (kind, value) tokens for a formula.
+
+    A symbol name is any run of text between operators and parentheses,
+    with surrounding whitespace stripped, so names such as
+    "A is a Knight" are read as a single symbol.
+    """
+    start = 0
+    for match in TOKEN.finditer(text):
+        word = text[start:match.start()].strip()
+        if word:
+            yield NAME, word
+        yield OPERATORS[match.group()], match.group()
+        start = match.end()
+    word = text[start:].strip()
+    if word:
+        yield NAME, word
+
+
+def parse(text, symbols=None):
+    """
+    Parses a formula written in the syntax produced by `formula()`
+    and returns the corresponding logical sentence.
+
+    The parser keeps explicit operator and operand stacks rather than
+    recursing, so arbitrarily deep formulas can be read. `symbols` may be
+    a dict shared between calls so that equal names map to one Symbol.
+    """
+    if symbols is None:
+        symbols = dict()
+    operands = []
+    operators = []
+    expect_operand = True
+
+    def reduce():
+        """Applies the operator on top of the stack to its operands."""
+        operator = operators.pop()
+        if operator == NOT:
+            operands.append(Not(operands.pop()))
+            return
+        right = operands.pop()
+        left = operands.pop()
+
+        # Chains like a ∧ b ∧ c extend one node built by this parser,
+        # which keeps long conjunctions linear rather than quadratic
+        if operator == AND:
+            if isinstance(left, And):
+                left.add(right)
+                operands.append(left)
+            else:
+                operands.append(And(left, right))
+        elif operator == OR:
+            if isinstance(left, Or):
+                left.disjuncts.append(right)
+                operands.append(left)
+            else:
+                operands.append(Or(left, right))
+        elif operator == IMPLIES:
+            operands.append(Implication(left, right))
+        else:
+            operands.append(Biconditional(left, right))
+
+    for kind, value in tokenize(text):
+        if expect_operand:
+            if kind == NAME:
+                if value not in symbols:
+                    symbols[value] = Symbol(value)
+                operands.append(symbols[value])
+                expect_operand = False
+            elif kind in (NOT, LPAREN):
+                operators.append(kind)
+            else:
+                raise ValueError(f"expected a symbol before {value!r}")
+        elif kind == RPAREN:
+            while operators and operators[-1] != LPAREN:
+                reduce()
+            if not operators:
+                raise ValueError("unbalanced ')'")
+            operators.pop()
+        elif kind in PRECEDENCE:
+            precedence, right = PRECEDENCE[kind]
+            while operators and operators[-1] != LPAREN and (
+                operators[-1] == NOT
+                or PRECEDENCE[operators[-1]][0] > precedence
+                or (PRECEDENCE[operators[-1]][0] == precedence and not right)
+            ):
+                reduce()
+            operators.append(kind)
+            expect_operand = True
+        else:
+            raise ValueError(f"expected an operator before {value!r}")
+
+    if not operands and not operators:
+        return And()
+    if expect_operand:
+        raise ValueError("formula ends with an operator")
+    while operators:
+        if operators[-1] == LPAREN:
+            raise ValueError("unbalanced '('")
+        reduce()
+    return operands.pop()
+
+
+def load(filename):
+    """
+    Loads a knowledge base from a text file with one formula per line.
+    Blank lines and lines starting with "#" are ignored.
+    Returns the conjunction of all formulas in the file.
+    """
+    knowledge = And()
+    symbols = dict()
+    with open(filename, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                knowledge.add(parse(line, symbols))
+    return knowledge
+
+
+def load_dimacs(filename):
+    """
+    Loads a DIMACS CNF file as a conjunction of disjunctions.
+
+    Variables are named after their number, unless the file carries
+    "c var <number> <name>" comments as written by `dump_dimacs`.
+    The file is read line by line, so clauses may span several lines.
+    Reading stops at a "%" line, which ends the clauses in SATLIB files.
+    """
+    names = dict()
+    symbols = dict()
+    knowledge = And()
+    clause = []
+
+    def literal(number):
+        """Returns the literal for a signed DIMACS variable."""
+        variable = abs(number)
+        if variable not in symbols:
+            symbols[variable] = Symbol(names.get(variable, str(variable)))
+        symbol = symbols[variable]
+        return symbol if number > 0 else Not(symbol)
+
+    with open(filename, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+
+            # SATLIB files end with a "%" line followed by a stray "0"
+            if line.startswith("%"):
+                break
+            if not line:
+                continue
+            if line.startswith("c"):
+                parts = line.split(maxsplit=3)
+                if len(parts) == 4 and parts[1] == "var":
+                    names[int(parts[2])] = parts[3]
+                continue
+            if line.startswith("p"):
+                continue
+            for number in map(int, line.split()):
+                if number == 0:
+                    knowledge.add(Or(*clause))
+                    clause = []
+                else:
+                    clause.append(literal(number))
+    if clause:
+        knowledge.add(Or(*clause))
+    return knowledge
+
+
+def dump_dimacs(knowledge, filename):
+    """
+    Writes a knowledge base in conjunctive normal form to a DIMACS file.
+
+    `knowledge` must be a conjunction whose conjuncts are disjunctions
+    of literals (or single literals). Variables are numbered in order of
+    first appearance and their names are recorded in "c var" comments.
+    """
+    numbers = dict()
+    clauses = []
+    for conjunct in knowledge.conjuncts:
+        literals = conjunct.disjuncts if isinstance(conjunct, Or) else [conjunct]
+        clause = []
+        for literal in literals:
+            negated = isinstance(literal, Not)
+            symbol = literal.operand if negated else literal
+            if not isinstance(symbol, Symbol):
+                raise ValueError(f"not in CNF: {conjunct.formula()}")
+            if symbol.name not in numbers:
+                numbers[symbol.name] = len(numbers) + 1
+            number = numbers[symbol.name]
+            clause.append(-number if negated else number)
+        clauses.append(clause)
+
+    with open(filename, "w", encoding="utf-8") as f:
+        for name, number in numbers.items():
+            if name != str(number):
+                f.write(f"c var {number} {name}\n")
+        f.write(f"p cnf {len(numbers)} {len(clauses)}\n")
+        for clause in clauses:
+            f.write(" ".join(map(str, clause)) + " 0\n")
@@ -1,4 +1,6 @@
+import concurrent.futures
 import itertools
+import multiprocessing
 
 
 class Sentence():
@@ -15,6 +17,10 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def operands(self):
+        """Returns the list of sentences this sentence is built from."""
+        return []
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -69,43 +75,266 @@ class Symbol(Sentence):
         return {self.name}
 
 
-class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+# Returned by `resolve` while more operands must be evaluated
+PENDING = object()
+
+
+def fold(sentence, combine):
+    """
+    Combines a sentence bottom-up without recursion.
+
+    `combine(node, parts)` is called on every node after all of its
+    operands, with `parts` holding the values computed for them.
+    """
+    results = []
+    stack = [(sentence, None)]
+    while stack:
+        node, operands = stack.pop()
+        if operands is None:
+            operands = node.operands()
+            if operands:
+                stack.append((node, operands))
+                stack.extend((operand, None) for operand in reversed(operands))
+                continue
+            results.append(combine(node, []))
+        else:
+            count = len(operands)
+            parts = results[-count:]
+            del results[-count:]
+            results.append(combine(node, parts))
+    return results.pop()
+
+
+def bare(sentence):
+    """
+    Checks whether a sentence's formula is left as is by
+    `Sentence.parenthesize`, without building the formula of a connective.
+    """
+    while (isinstance(sentence, Connective) and sentence.nary
+           and len(sentence.operands()) == 1):
+        sentence = sentence.operands()[0]
+    if isinstance(sentence, Connective):
+        return sentence.nary and not sentence.operands()
+    formula = sentence.formula()
+    return Sentence.parenthesize(formula) == formula
+
+
+class Connective(Sentence):
+    """
+    A sentence built from other sentences by a logical connective.
+
+    Evaluation, formulas, symbols, hashing, equality and pickling all
+    walk the sentence with an explicit stack, so arbitrarily deep
+    sentences do not run into Python's recursion limit. Subclasses
+    describe themselves through `operands` and the attributes below.
+
+    Connectives over any number of operands are decided by the first
+    operand whose value differs from `empty`. Connectives over a fixed
+    number of operands define `resolve(index, value, first)` instead,
+    which is given the value of operand `index` (and of the first
+    operand) and returns the value of the sentence, or PENDING if the
+    next operand must be evaluated too.
+    """
+
+    # Value of the connective with no operands
+    empty = True
+
+    # Name used in hashes
+    tag = None
+
+    # Formula written before the operands and between each pair of them
+    prefix = ""
+    separator = ""
+
+    # Whether the connective takes any number of operands, is decided by
+    # the first operand whose value differs from `empty`, and writes a
+    # single operand without parentheses
+    nary = False
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        pairs = [(self, other)]
+        while pairs:
+            left, right = pairs.pop()
+            if not isinstance(left, Connective):
+                if left != right:
+                    return False
+                continue
+            if not isinstance(right, type(left)):
+                return False
+            operands, others = left.operands(), right.operands()
+            if len(operands) != len(others):
+                return False
+            pairs.extend(zip(operands, others))
+        return True
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
-
-    def __repr__(self):
-        return f"Not({self.operand})"
+        return fold(self, lambda node, parts: (
+            hash((node.tag, tuple(parts)))
+            if isinstance(node, Connective) else hash(node)
+        ))
+
+    def __reduce__(self):
+        # Pickle the nodes as a flat list in post-order, see `rebuild`
+        nodes = []
+        fold(self, lambda node, parts: nodes.append(
+            (type(node), len(parts)) if isinstance(node, Connective) else node
+        ))
+        return rebuild, (nodes,)
 
     def evaluate(self, model):
-        return not self.operand.evaluate(model)
+        try:
+            return self.walk(model)
+        except KeyError as error:
+            raise Exception(f"variable {error.args[0]} not in model")
+
+    def walk(self, model):
+        """
+        Evaluates the sentence with an explicit stack of frames, one for
+        each sentence waiting on an operand that is not a literal.
+        """
+        stack = []
+        value = self.scan(model, stack)
+        while stack:
+            parent, index, first = stack[-1]
+
+            # Evaluate the operand the top frame is waiting on, unless a
+            # child just returned its value
+            if value is PENDING:
+                operand = parent.operands()[index]
+                if isinstance(operand, Connective):
+                    value = operand.scan(model, stack)
+                    if value is PENDING:
+                        continue
+                else:
+                    value = operand.evaluate(model)
+            stack.pop()
+            value = parent.scan(model, stack, index, first, value)
+        return value
+
+    def scan(self, model, stack, index=0, first=None, value=PENDING):
+        """
+        Combines the values of the operands from `index` on, for as long
+        as they are literals, where `value` is that of operand `index` if
+        already known. Operands that are connectives over literals are
+        scanned too, with no `stack`.
+
+        Returns the value of the sentence, or PENDING after pushing a
+        frame of (sentence, index, first value) onto `stack` for the first
+        operand that must be evaluated on its own. Without a `stack`, the
+        sentence is left PENDING instead.
+        """
+        operands = self.operands()
+        empty = self.empty
+        if not operands:
+            return empty
+        nary = self.nary
+        last = len(operands) - 1
+        while True:
+
+            # Literals are looked up directly, and connectives over
+            # literals scanned in place; anything else gets a frame
+            if value is PENDING:
+                operand = operands[index]
+                kind = type(operand)
+                if kind is Symbol:
+                    value = model[operand.name]
+                elif kind is Not and type(operand.operand) is Symbol:
+                    value = not model[operand.operand.name]
+                elif stack is not None and isinstance(operand, Connective):
+                    value = operand.scan(model, None)
+                if value is PENDING:
+                    if stack is not None:
+                        stack.append((self, index, first))
+                    return PENDING
+
+            # Combine the value, moving on if the sentence is undecided
+            if nary:
+                if bool(value) is not empty:
+                    return not empty
+            else:
+                if index == 0:
+                    first = value
+                value = self.resolve(index, value, first)
+                if value is not PENDING:
+                    return value
+            if index == last:
+                return empty
+            index += 1
+            value = PENDING
 
     def formula(self):
-        return "¬" + Sentence.parenthesize(self.operand.formula())
+
+        # Fragments are emitted left to right from a stack of pending
+        # strings and (sentence, parenthesize) pairs, so the formula is
+        # built in one pass rather than re-copied at every level
+        fragments = []
+        stack = [(self, False)]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                fragments.append(item)
+                continue
+            node, wrap = item
+            if wrap:
+                stack.append(")")
+            if not isinstance(node, Connective):
+                stack.append(node.formula())
+            else:
+                operands = node.operands()
+                if len(operands) == 1 and node.nary:
+                    stack.append((operands[0], False))
+                else:
+                    for i in reversed(range(len(operands))):
+                        stack.append((operands[i], not bare(operands[i])))
+                        if i:
+                            stack.append(node.separator)
+                    stack.append(node.prefix)
+            if wrap:
+                stack.append("(")
+        return "".join(fragments)
 
     def symbols(self):
-        return self.operand.symbols()
+        symbols = set()
+        seen = set()
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Symbol):
+                symbols.add(node.name)
+            elif id(node) not in seen:
+                seen.add(id(node))
+                stack.extend(node.operands())
+        return symbols
+
+
+class Not(Connective):
+    tag = "not"
+    prefix = "¬"
 
+    def __init__(self, operand):
+        Sentence.validate(operand)
+        self.operand = operand
 
-class And(Sentence):
-    def __init__(self, *conjuncts):
-        for conjunct in conjuncts:
-            Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+    def __repr__(self):
+        return f"Not({self.operand})"
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+    def operands(self):
+        return [self.operand]
+
+    def resolve(self, index, value, first):
+        return not value
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+
+class And(Connective):
+    tag = "and"
+    empty = True
+    separator = " ∧ "
+    nary = True
+
+    def __init__(self, *conjuncts):
+        self.conjuncts = []
+        for conjunct in conjuncts:
+            self.add(conjunct)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,125 +343,128 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        """
+        Adds a conjunct, merging in the conjuncts of a nested And.
+        A nested And is copied, so later changes to it are not seen here.
+        """
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
-
-    def evaluate(self, model):
-        return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
+        if isinstance(conjunct, And):
+            self.conjuncts.extend(conjunct.conjuncts)
+        else:
+            self.conjuncts.append(conjunct)
 
-    def formula(self):
-        if len(self.conjuncts) == 1:
-            return self.conjuncts[0].formula()
-        return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
-                           for conjunct in self.conjuncts])
+    def operands(self):
+        return self.conjuncts
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+class Or(Connective):
+    tag = "or"
+    empty = False
+    separator = " ∨  "
+    nary = True
 
-class Or(Sentence):
     def __init__(self, *disjuncts):
+        self.disjuncts = []
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+            # Merge in the disjuncts of a nested Or
+            if isinstance(disjunct, Or):
+                self.disjuncts.extend(disjunct.disjuncts)
+            else:
+                self.disjuncts.append(disjunct)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
 
-    def evaluate(self, model):
-        return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
-
-    def formula(self):
-        if len(self.disjuncts) == 1:
-            return self.disjuncts[0].formula()
-        return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
-                            for disjunct in self.disjuncts])
+    def operands(self):
+        return self.disjuncts
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+class Implication(Connective):
+    tag = "implies"
+    separator = " => "
 
-class Implication(Sentence):
     def __init__(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
         self.antecedent = antecedent
         self.consequent = consequent
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
-
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
 
-    def evaluate(self, model):
-        return ((not self.antecedent.evaluate(model))
-                or self.consequent.evaluate(model))
+    def operands(self):
+        return [self.antecedent, self.consequent]
 
-    def formula(self):
-        antecedent = Sentence.parenthesize(self.antecedent.formula())
-        consequent = Sentence.parenthesize(self.consequent.formula())
-        return f"{antecedent} => {consequent}"
+    def resolve(self, index, value, first):
+        if index == 0:
+            return PENDING if value else True
+        return value
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+class Biconditional(Connective):
+    tag = "biconditional"
+    separator = " <=> "
 
-class Biconditional(Sentence):
     def __init__(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
         self.left = left
         self.right = right
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
-
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
-    def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+    def operands(self):
+        return [self.left, self.right]
+
+    def resolve(self, index, value, first):
+        if index == 0:
+            return PENDING
+        return value == first
+
+
+def rebuild(nodes):
+    """
+    Rebuilds a sentence pickled by `Connective.__reduce__` from its
+    nodes in post-order: each connective is given as (class, number of
+    operands), and follows its operands.
+    """
+    results = []
+    for node in nodes:
+        if isinstance(node, tuple):
+            kind, count = node
+            operands = results[len(results) - count:]
+            del results[len(results) - count:]
+            results.append(kind(*operands))
+        else:
+            results.append(node)
+    return results.pop()
 
-    def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
-        return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+def model_check(knowledge, query, split=0, processes=None, stats=None):
+    """
+    Checks if knowledge base entails query.
 
+    If a `stats` dict is given, the number of models evaluated is added
+    to its "models" entry.
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    If `split` is positive, the assignment space is divided on the first
+    `split` symbols and the resulting subproblems are checked across a
+    pool of `processes` workers (all cores by default). The pool stops as
+    soon as any worker finds a model where the knowledge base holds but
+    the query does not.
+    """
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
         # If model has an assignment for each symbol
         if not symbols:
+            if stats is not None:
+                stats["models"] = stats.get("models", 0) + 1
 
             # If knowledge base is true in model, then query must also be true
             if knowledge.evaluate(model):
@@ -259,5 +491,83 @@ def model_check(knowledge, query):
     # Get all symbols in both knowledge and query
     symbols = set.union(knowledge.symbols(), query.symbols())
 
+    # Fan subproblems out to a process pool if requested
+    if split > 0 and symbols:
+        return parallel_check(knowledge, query, symbols, split, processes,
+                              stats)
+
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+# Set in each pool worker once any worker has found a counter-model
+_cancelled = None
+
+# How many models a worker checks between looks at the cancel flag
+CANCEL_INTERVAL = 1024
+
+
+def _init_worker(cancelled):
+    global _cancelled
+    _cancelled = cancelled
+
+
+def _check_partition(knowledge, query, symbols, model):
+    """
+    Checks every model extending `model` over `symbols`, stopping early
+    if another worker has already found a counter-model.
+    Returns the result together with the number of models evaluated.
+    """
+    count = 0
+    for values in itertools.product((True, False), repeat=len(symbols)):
+        if count % CANCEL_INTERVAL == 0 and _cancelled.is_set():
+            return True, count
+        count += 1
+        model.update(zip(symbols, values))
+        if knowledge.evaluate(model) and not query.evaluate(model):
+            _cancelled.set()
+            return False, count
+    return True, count
+
+
+def parallel_check(knowledge, query, symbols, split, processes=None,
+                   stats=None):
+    """
+    Checks entailment by splitting the models on the first `split`
+    symbols and checking each partition in a separate process.
+    """
+    symbols = sorted(symbols)
+    split = min(split, len(symbols))
+    fixed, free = symbols[:split], symbols[split:]
+
+    cancelled = multiprocessing.Event()
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(cancelled,)
+    ) as pool:
+        futures = [
+            pool.submit(_check_partition, knowledge, query, free,
+                        dict(zip(fixed, values)))
+            for values in itertools.product((True, False), repeat=split)
+        ]
+        entailed = True
+        pending = set(futures)
+        for future in concurrent.futures.as_completed(futures):
+            pending.discard(future)
+            result, count = future.result()
+            if stats is not None:
+                stats["models"] = stats.get("models", 0) + count
+            if not result:
+                entailed = False
+                cancelled.set()
+                for other in futures:
+                    other.cancel()
+                break
+
+        # Count models from partitions that were already running
+        if stats is not None:
+            for future in pending:
+                if not future.cancelled():
+                    stats["models"] += future.result()[1]
+    return entailed
@@ -0,0 +1,356 @@
+import itertools
+
+from logic import *
+
+# Largest number of clauses a disjunction may expand into before its
+# operands are replaced by fresh definition symbols
+EXPANSION_LIMIT = 64
+
+# Prefix for definition symbols introduced during CNF conversion
+DEFINITION = "#"
+
+# A sentence that is false in every model
+CONTRADICTION = Or()
+
+
+class Clauses():
+    """
+    Set of clauses over integer literals, as in DIMACS: symbol n is the
+    literal n and its negation -n. Each clause is a frozenset of literals.
+    Clauses are indexed by literal so simplification steps only touch the
+    clauses that mention the literals they change.
+    """
+
+    def __init__(self, clauses=()):
+        self.clauses = set()
+        self.occurs = dict()
+        self.conflict = False
+        for clause in clauses:
+            self.add(clause)
+
+    def __len__(self):
+        return len(self.clauses)
+
+    def __iter__(self):
+        return iter(self.clauses)
+
+    def add(self, clause):
+        """Adds a clause, dropping tautologies and noting empty clauses."""
+        if not clause:
+            self.conflict = True
+            return
+        if any(-literal in clause for literal in clause):
+            return
+        if clause in self.clauses:
+            return
+        self.clauses.add(clause)
+        for literal in clause:
+            self.occurs.setdefault(literal, set()).add(clause)
+
+    def remove(self, clause):
+        self.clauses.discard(clause)
+        for literal in clause:
+            self.occurs[literal].discard(clause)
+
+    def containing(self, literal):
+        """Returns the clauses containing `literal`."""
+        return self.occurs.get(literal, set())
+
+    def variables(self):
+        return {abs(literal) for literal in self.occurs if self.occurs[literal]}
+
+    def assign(self, literal):
+        """
+        Makes `literal` true: clauses containing it are satisfied and
+        removed, and its negation is removed from all other clauses.
+        Returns the clauses that became units.
+        """
+        units = []
+        for clause in list(self.containing(literal)):
+            self.remove(clause)
+        for clause in list(self.containing(-literal)):
+            self.remove(clause)
+            shorter = clause - {-literal}
+            self.add(shorter)
+            if len(shorter) == 1:
+                units.append(shorter)
+        return units
+
+
+def to_cnf(sentence, numbers):
+    """
+    Converts a sentence to a list of clauses.
+
+    `numbers` maps symbol names to their integer variables and is
+    extended with any new symbols. Disjunctions that would expand into
+    more than EXPANSION_LIMIT clauses get a fresh definition symbol for
+    each operand instead, which preserves satisfiability (not equivalence).
+    """
+    definitions = []
+
+    def variable(name):
+        if name not in numbers:
+            numbers[name] = len(numbers) + 1
+        return numbers[name]
+
+    def define(cnf):
+        """Returns a single-literal CNF implying `cnf`."""
+        if len(cnf) <= 1:
+            return cnf
+        literal = variable(f"{DEFINITION}{len(numbers) + 1}")
+        definitions.extend(clause | {-literal} for clause in cnf)
+        return [frozenset({literal})]
+
+    def disjoin(cnfs):
+        """Returns the CNF of the disjunction of several CNFs."""
+        if any(len(cnf) == 0 for cnf in cnfs):
+            return []
+        size = 1
+        for cnf in cnfs:
+            size *= len(cnf)
+        if size > EXPANSION_LIMIT:
+            cnfs = [define(cnf) for cnf in cnfs]
+        return [frozenset().union(*clauses)
+                for clauses in itertools.product(*cnfs)]
+
+    def conjoin(cnfs):
+        """Returns the CNF of the conjunction of several CNFs."""
+        return [clause for cnf in cnfs for clause in cnf]
+
+    def expand(node, positive):
+        """
+        Returns the (sentence, polarity) pairs whose CNFs make up the CNF
+        of `node` with the given polarity, and how to combine them.
+        """
+        if isinstance(node, Not):
+            return [(node.operand, not positive)], lambda parts: parts[0]
+        if isinstance(node, (And, Or)):
+            join = conjoin if isinstance(node, And) == positive else disjoin
+            return [(operand, positive) for operand in node.operands()], join
+        if isinstance(node, Implication):
+            if positive:
+                return ([(node.antecedent, False), (node.consequent, True)],
+                        disjoin)
+            return ([(node.antecedent, True), (node.consequent, False)],
+                    conjoin)
+        if isinstance(node, Biconditional):
+            return (
+                [(node.left, not positive), (node.right, True),
+                 (node.left, positive), (node.right, False)],
+                lambda parts: conjoin([disjoin(parts[:2]),
+                                       disjoin(parts[2:])])
+            )
+        raise TypeError("must be a logical sentence")
+
+    # Convert bottom-up with an explicit stack, only ever building the
+    # polarity of each operand that is actually needed
+    results = []
+    stack = [(sentence, True, None)]
+    while stack:
+        node, positive, pending = stack.pop()
+        if isinstance(node, Symbol):
+            n = variable(node.name)
+            results.append([frozenset({n if positive else -n})])
+        elif pending is None:
+            operands, join = expand(node, positive)
+            stack.append((node, positive, (len(operands), join)))
+            stack.extend((operand, polarity, None)
+                         for operand, polarity in reversed(operands))
+        else:
+            count, join = pending
+            parts = results[len(results) - count:]
+            del results[len(results) - count:]
+            results.append(join(parts))
+    return results.pop() + definitions
+
+
+def unit_propagate(clauses):
+    """
+    Assigns every literal forced by a unit clause, until none remain.
+    Returns the number of literals assigned.
+    """
+    units = [clause for clause in clauses if len(clause) == 1]
+    assigned = set()
+    while units and not clauses.conflict:
+        (literal,) = units.pop()
+        if literal in assigned:
+            continue
+        if -literal in assigned:
+            clauses.conflict = True
+            break
+        assigned.add(literal)
+        units.extend(clauses.assign(literal))
+    return len(assigned)
+
+
+def eliminate_pure_literals(clauses):
+    """
+    Assigns every literal whose negation appears in no clause.
+    Returns the number of literals assigned.
+    """
+    count = 0
+    pure = [literal for literal in clauses.occurs
+            if clauses.occurs[literal] and not clauses.containing(-literal)]
+    for literal in pure:
+        if clauses.containing(literal):
+            clauses.assign(literal)
+            count += 1
+    return count
+
+
+def remove_subsumed(clauses):
+    """
+    Removes every clause that is a superset of another clause.
+    Returns the number of clauses removed.
+    """
+    kept = dict()
+    removed = 0
+    for clause in sorted(clauses, key=len):
+
+        # Each kept clause is indexed under one of its literals, so only
+        # clauses indexed under a literal of `clause` can be its subset
+        if any(other <= clause
+               for literal in clause
+               for other in kept.get(literal, ())):
+            clauses.remove(clause)
+            removed += 1
+        else:
+            kept.setdefault(min(clause), []).append(clause)
+    return removed
+
+
+def substitute_equivalent_literals(clauses):
+    """
+    Finds literals forced equal by pairs of binary clauses, such as
+    (a ∨ ¬b) and (¬a ∨ b), and rewrites every clause in terms of one
+    representative per group. Returns the number of variables replaced.
+    """
+    parent = dict()
+
+    def find(literal):
+        root = literal
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while parent.get(literal, literal) != root:
+            parent[literal], literal = root, parent[literal]
+        return root
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a != b:
+            if abs(b) < abs(a):
+                a, b = b, a
+            parent[b] = a
+
+    for clause in clauses:
+        if len(clause) == 2:
+            a, b = clause
+            if frozenset({-a, -b}) in clauses.clauses:
+                union(a, -b)
+                union(-a, b)
+
+    replacements = dict()
+    for variable in {abs(literal) for literal in parent}:
+        if find(variable) == find(-variable):
+            clauses.conflict = True
+            return 0
+        representative = find(variable)
+        if representative != variable:
+            replacements[variable] = representative
+            replacements[-variable] = -representative
+
+    if replacements:
+        changed = [clause for clause in clauses
+                   if any(literal in replacements for literal in clause)]
+        for clause in changed:
+            clauses.remove(clause)
+        for clause in changed:
+            clauses.add(frozenset(replacements.get(literal, literal)
+                                  for literal in clause))
+    return len(replacements) // 2
+
+
+def simplify(clauses):
+    """
+    Runs unit propagation, pure literal elimination, equivalent-literal
+    substitution and subsumption until none of them changes `clauses`.
+    """
+    changed = True
+    while changed and not clauses.conflict:
+        changed = bool(
+            unit_propagate(clauses)
+            + eliminate_pure_literals(clauses)
+            + substitute_equivalent_literals(clauses)
+            + remove_subsumed(clauses)
+        )
+    return clauses
+
+
+def preprocess(knowledge, query):
+    """
+    Shrinks the problem of checking whether `knowledge` entails `query`.
+
+    Returns a sentence that is satisfiable exactly when `knowledge` ∧
+    ¬`query` is, so `knowledge` entails `query` exactly when the sentence
+    entails CONTRADICTION, together with a report of how many symbols and
+    clauses were eliminated.
+
+    The sentence is the simplified CNF, unless its original symbols and
+    remaining definition symbols together outnumber the symbols of the
+    problem, in which case `knowledge` ∧ ¬`query` itself is returned so
+    model checking never has more symbols to enumerate than before.
+    Definition symbols are reported separately from eliminated ones.
+    """
+    numbers = dict()
+    symbols = set.union(knowledge.symbols(), query.symbols())
+    problem = And(knowledge, Not(query))
+    clauses = Clauses(to_cnf(problem, numbers))
+    before = len(clauses)
+    simplify(clauses)
+
+    names = {number: name for name, number in numbers.items()}
+    if clauses.conflict:
+        sentence = CONTRADICTION
+        remaining = set()
+    else:
+        sentence = And(*[
+            Or(*[Symbol(names[literal]) if literal > 0
+                 else Not(Symbol(names[-literal]))
+                 for literal in sorted(clause, key=abs)])
+            for clause in clauses
+        ])
+        remaining = {names[variable] for variable in clauses.variables()}
+    definitions = len(remaining - symbols)
+    after = 0 if clauses.conflict else len(clauses)
+
+    # Fall back to the original problem rather than enumerate more symbols
+    fallback = len(remaining) > len(symbols)
+    if fallback:
+        sentence = problem
+        remaining = symbols
+        definitions = 0
+        after = before
+
+    report = {
+        "symbols_before": len(symbols),
+        "symbols_after": len(remaining & symbols),
+        "symbols_eliminated": len(symbols - remaining),
+        "definition_symbols": definitions,
+        "clauses_before": before,
+        "clauses_after": after,
+        "clauses_eliminated": before - after,
+        "fallback": fallback
+    }
+    return sentence, report
+
+
+def entails(knowledge, query, report=None, **options):
+    """
+    Checks if knowledge base entails query by running `model_check`
+    on the preprocessed problem. `options` are passed on to
+    `model_check`, and the preprocessing report is added to `report`.
+    """
+    sentence, counts = preprocess(knowledge, query)
+    if report is not None:
+        report.update(counts)
+    return model_check(sentence, CONTRADICTION, **options)
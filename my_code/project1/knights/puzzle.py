@@ -15,26 +15,32 @@ Box = [[AKnight, AKnave], [BKnight, BKnave], [CKnight, CKnave]]
 Word = [None, None, None] # What A, B, C says
 
 # Construct knowledge base
-def ConstructKnowledge(personCount):
+# `box` and `word` default to Box and Word, which the puzzles below fill
+# in, but generated puzzles with more inhabitants can pass their own
+def ConstructKnowledge(personCount, box=None, word=None):
+    if box is None:
+        box = Box
+    if word is None:
+        word = Word
     knowledge = And()
     for i in range(personCount):
         # A person must have one identity
-        knowledge.add(Or(Box[i][0], Box[i][1]))
+        knowledge.add(Or(box[i][0], box[i][1]))
         # A person cannot have both identity
-        knowledge.add(Implication(Box[i][0], Not(Box[i][1])))
-        knowledge.add(Implication(Box[i][1], Not(Box[i][0])))
-        if Word[i] != None:
-            if isinstance(Word[i], list): # if the person says multiple words, we use list to store them
-                for w in Word[i]:
+        knowledge.add(Implication(box[i][0], Not(box[i][1])))
+        knowledge.add(Implication(box[i][1], Not(box[i][0])))
+        if word[i] != None:
+            if isinstance(word[i], list): # if the person says multiple words, we use list to store them
+                for w in word[i]:
                     # A knight says true word
-                    knowledge.add(Implication(Box[i][0], w))
+                    knowledge.add(Implication(box[i][0], w))
                     # A knave says false word
-                    knowledge.add(Implication(Box[i][1], Not(w)))
+                    knowledge.add(Implication(box[i][1], Not(w)))
             else: # the person only says one word
                 # A knight says true word
-                knowledge.add(Implication(Box[i][0], Word[i]))
+                knowledge.add(Implication(box[i][0], word[i]))
                 # A knave says false word
-                knowledge.add(Implication(Box[i][1], Not(Word[i])))
+                knowledge.add(Implication(box[i][1], Not(word[i])))
     return knowledge
 
 
@@ -0,0 +1,26 @@
+import os
+import tempfile
+import unittest
+
+from logic import *
+from loader import load_dimacs
+
+
+class LoadDimacsTest(unittest.TestCase):
+
+    def load(self, text):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "knowledge.cnf")
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(text)
+            return load_dimacs(filename)
+
+    def test_satlib_trailer(self):
+        knowledge = self.load("p cnf 2 2\n1 2 0\n-2 0\n%\n0\n")
+        self.assertEqual(len(knowledge.conjuncts), 2)
+        self.assertTrue(model_check(knowledge, Symbol("1")))
+        self.assertFalse(model_check(knowledge, Not(Symbol("1"))))
+
+
+if __name__ == "__main__":
+    unittest.main()
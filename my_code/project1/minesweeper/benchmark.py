@@ -0,0 +1,87 @@
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Boards as (height, width, mines)
+BOARDS = [
+    (16, 16, 40),
+    (16, 30, 99),
+    (30, 60, 400)
+]
+
+# Games played on each board with each representation
+GAMES = 100
+
+# Share of a board's safe cells revealed when measuring memory
+REVEALED = 0.5
+
+
+def main():
+    if len(sys.argv) not in [1, 2]:
+        sys.exit("Usage: python benchmark.py [output.json]")
+
+    results = []
+    for height, width, mines in BOARDS:
+        for bitset in [False, True]:
+            results.append(measure(height, width, mines, bitset))
+
+    output = json.dumps(results, indent=2)
+    if len(sys.argv) == 2:
+        with open(sys.argv[1], "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+def measure(height, width, mines, bitset, games=GAMES):
+    """
+    Plays `games` seeded games with sets or bitmasks as sentences, and
+    returns the time spent in `add_knowledge` together with the memory
+    the AI holds once REVEALED of one board's safe cells are known.
+    """
+    seconds = 0
+    moves = 0
+    for seed in range(games):
+        random.seed(seed)
+        game = Minesweeper(height=height, width=width, mines=mines)
+        ai = MinesweeperAI(height=height, width=width, bitset=bitset, mines=mines)
+        while True:
+            move = ai.make_safe_move() or ai.make_random_move()
+            if move is None or game.is_mine(move):
+                break
+            start = time.perf_counter()
+            ai.add_knowledge(move, game.nearby_mines(move))
+            seconds += time.perf_counter() - start
+            moves += 1
+
+    # Reveal safe cells in a fixed order, so both representations end up
+    # with the same sentences
+    random.seed(0)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    safe = [(i, j) for i in range(height) for j in range(width)
+            if not game.is_mine((i, j))]
+    random.shuffle(safe)
+    tracemalloc.start()
+    ai = MinesweeperAI(height=height, width=width, bitset=bitset, mines=mines)
+    for cell in safe[:int(len(safe) * REVEALED)]:
+        ai.add_knowledge(cell, game.nearby_mines(cell))
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return {
+        "board": f"{height}x{width}, {mines} mines",
+        "sentences": "bitset" if bitset else "sets",
+        "moves": moves,
+        "seconds": seconds,
+        "microseconds_per_move": seconds / moves * 1e6,
+        "knowledge": len(ai.knowledge),
+        "kilobytes": memory / 1e3
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import math
+
+# Largest component, in cells, that is eliminated
+LIMIT = 128
+
+
+def deduce(component, limit=LIMIT):
+    """
+    Returns the sets of cells that must be safe and that must be mines
+    according to `component`, a list of (cells, count) constraints.
+
+    Each constraint is an equation over 0/1 cell variables. The equations
+    are put in reduced row echelon form with integer row operations, which
+    combines any number of constraints at once, and every reduced row is
+    then checked for cells whose value alone decides whether the row can
+    still be satisfied. Components over more than `limit` cells are
+    skipped.
+    """
+    cells = set()
+    for constraint, _ in component:
+        cells |= set(constraint)
+    if len(cells) > limit:
+        return set(), set()
+
+    safes = set()
+    mines = set()
+    for row in reduce([({cell: 1 for cell in constraint}, count)
+                       for constraint, count in component]):
+        row_safes, row_mines = bounds(row)
+        safes |= row_safes
+        mines |= row_mines
+    return safes, mines
+
+
+def combine(row, other, pivot):
+    """
+    Returns `row` with `pivot` eliminated using `other`, scaled down
+    so its coefficients have no common factor.
+    """
+    coefficients, total = row
+    others, other_total = other
+    a = others[pivot]
+    b = coefficients[pivot]
+
+    combined = dict()
+    for cell in coefficients.keys() | others.keys():
+        value = a * coefficients.get(cell, 0) - b * others.get(cell, 0)
+        if value:
+            combined[cell] = value
+    total = a * total - b * other_total
+
+    divisor = math.gcd(total, *combined.values())
+    if divisor > 1:
+        combined = {cell: value // divisor for cell, value in combined.items()}
+        total //= divisor
+    return combined, total
+
+
+def reduce(equations):
+    """
+    Returns the nonzero rows of the reduced row echelon form of
+    `equations`, a list of (coefficients, total) pairs with coefficients
+    mapping cells to integers. Rows stay sparse dicts throughout.
+    """
+    rows = []
+    for row in equations:
+
+        # Eliminate every earlier pivot from the new row
+        for pivot, other in rows:
+            if pivot in row[0]:
+                row = combine(row, other, pivot)
+        if not row[0]:
+            continue
+
+        # Then eliminate the new row's pivot from every earlier row
+        pivot = min(row[0])
+        rows = [
+            (other_pivot, combine(other, row, pivot) if pivot in other[0] else other)
+            for other_pivot, other in rows
+        ]
+        rows.append((pivot, row))
+    return [row for _, row in rows]
+
+
+def bounds(row):
+    """
+    Returns the cells of one equation that are forced safe or forced to
+    be mines by how far the total is from the smallest and largest values
+    the left-hand side can take.
+    """
+    coefficients, total = row
+    low = sum(value for value in coefficients.values() if value < 0)
+    high = sum(value for value in coefficients.values() if value > 0)
+
+    safes = set()
+    mines = set()
+    for cell, value in coefficients.items():
+
+        # Making the cell a mine would overshoot or undershoot the total
+        if (value > 0 and value > total - low) or (value < 0 and -value > high - total):
+            safes.add(cell)
+
+        # Keeping the cell safe would leave the total out of reach
+        elif (value > 0 and value > high - total) or (value < 0 and -value > total - low):
+            mines.add(cell)
+    return safes, mines
@@ -1,6 +1,41 @@
+import collections
+import functools
 import itertools
 import random
-import copy
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import linear
+from probability import ProbabilitySolver
+
+# Most cells whose neighbors are kept in the neighbor table
+NEIGHBOR_CACHE_SIZE = 1 << 20
+
+# Ways MinesweeperAI can combine sentences: pairwise subsets only, or
+# subsets followed by linear elimination over each changed component
+INFERENCE = ["subset", "linear"]
+
+
+@functools.lru_cache(maxsize=NEIGHBOR_CACHE_SIZE)
+def neighbors(cell, height, width):
+    """
+    Returns the cells within one row and column of `cell` on a board of
+    the given size, not including the cell itself.
+    Results are cached, so the AI builds its neighbor table lazily, one
+    cell at a time. The game needs no neighbor lookups, since it counts
+    every cell's nearby mines once, up front, in `count_mines`.
+    """
+    i, j = cell
+    return frozenset(
+        (x, y)
+        for x in range(max(i - 1, 0), min(i + 2, height))
+        for y in range(max(j - 1, 0), min(j + 2, width))
+        if (x, y) != cell
+    )
+
 
 class Minesweeper():
     """
@@ -15,20 +50,16 @@ class Minesweeper():
         self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        self.board = [[False] * width for _ in range(height)]
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Add mines at distinct random cells
+        for index in random.sample(range(height * width), mines):
+            i, j = divmod(index, width)
+            self.mines.add((i, j))
+            self.board[i][j] = True
+
+        # Count the mines next to every cell once, up front
+        self.counts = self.count_mines()
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -52,30 +83,45 @@ class Minesweeper():
         i, j = cell
         return self.board[i][j]
 
+    def count_mines(self):
+        """
+        Returns a grid holding, for every cell, the number of mines
+        within one row and column of it.
+        """
+        if numpy is not None:
+
+            # Sum the eight shifted copies of a zero-padded mine grid
+            padded = numpy.zeros((self.height + 2, self.width + 2), dtype=numpy.int8)
+            if self.mines:
+                rows, columns = numpy.array(list(self.mines)).T
+                padded[rows + 1, columns + 1] = 1
+            counts = numpy.zeros((self.height, self.width), dtype=numpy.int8)
+            for di in range(3):
+                for dj in range(3):
+                    if di != 1 or dj != 1:
+                        counts += padded[di:di + self.height, dj:dj + self.width]
+            return counts.tolist()
+
+        # Otherwise sum each row's cells in threes, then each column's row
+        # sums in threes, which counts the cell itself once too many
+        sums = [[0] * self.width]
+        for row in self.board:
+            padded = [False] + row + [False]
+            sums.append([a + b + c for a, b, c in zip(padded, padded[1:], padded[2:])])
+        sums.append([0] * self.width)
+        return [
+            [a + b + c - d for a, b, c, d in zip(above, middle, below, row)]
+            for above, middle, below, row in zip(sums, sums[1:], sums[2:], self.board)
+        ]
+
     def nearby_mines(self, cell):
         """
         Returns the number of mines that are
         within one row and column of a given cell,
         not including the cell itself.
         """
-
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        i, j = cell
+        return self.counts[i][j]
 
     def won(self):
         """
@@ -101,6 +147,32 @@ class Sentence():
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def freeze(self):
+        """
+        Returns a hashable snapshot of the sentence.
+        """
+        return frozenset(self.cells), self.count
+
+    def keys(self):
+        """
+        Returns the keys the knowledge base indexes this sentence under.
+        """
+        return self.cells
+
+    def within(self, other):
+        """
+        Checks if the cells of this sentence are a proper subset of
+        the cells of `other`.
+        """
+        return self.cells < other.cells
+
+    def minus(self, other):
+        """
+        Returns the sentence left after taking `other`, a subset of this
+        sentence, away from it.
+        """
+        return Sentence(self.cells - other.cells, self.count - other.count)
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
@@ -132,8 +204,8 @@ class Sentence():
         """
         
         # if a cell is known to be a mine, then we remove it from the set and decrease the count
-        # if there's only ONE cell in cells, then we ignore it, because we don't want to produce void sentence
-        if cell in self.cells and len(self.cells) > 1:
+        # a sentence left with no cells is dropped by the knowledge base
+        if cell in self.cells:
             self.cells.remove(cell)        
             self.count -= 1
         return
@@ -146,24 +218,337 @@ class Sentence():
         """
         
         # if a cell is known to be safe, then I simply remove it from the set
-        # if there's only ONE cell in cells, then we ignore it, because I don't want to produce void sentence
-        if cell in self.cells and len(self.cells) > 1:
+        # a sentence left with no cells is dropped by the knowledge base
+        if cell in self.cells:
             self.cells.remove(cell)
         return
         raise NotImplementedError
 
 
+class BitSentence():
+    """
+    Sentence whose cells are stored as the bits of an integer,
+    with cell (i, j) at bit i * width + j - offset, where `offset` is the
+    index of the sentence's first cell. Keeping masks shifted down to
+    their first cell keeps them a few rows wide rather than as wide as
+    the whole board, so subset tests and differences stay single
+    operations on small integers however large the board is.
+    The bit indices are only decoded when first asked for, and kept
+    until the mask changes; (i, j) cells are decoded from them on demand.
+    """
+
+    def __init__(self, cells, count, width=8, mask=0, offset=0):
+        self.width = width
+        for i, j in cells:
+            mask |= 1 << (i * width + j - offset)
+        self.set_mask(mask, offset)
+        self.count = count
+
+    @classmethod
+    def from_mask(cls, mask, count, width, offset=0):
+        return cls((), count, width, mask, offset)
+
+    def set_mask(self, mask, offset=0):
+        """
+        Replaces the cells of the sentence with the bits of `mask` moved
+        up by `offset`, forgetting the decoded bit indices.
+        """
+        low = (mask & -mask).bit_length() - 1
+        if low > 0:
+            mask >>= low
+            offset += low
+        self.mask = mask
+        self.offset = offset if mask else 0
+        self.indices = None
+
+    @property
+    def cells(self):
+        width = self.width
+        return frozenset(divmod(index, width) for index in self.keys())
+
+    def keys(self):
+        """
+        Returns the bit index of every cell on the board, which is what
+        the knowledge base indexes bit sentences under.
+        """
+        if self.indices is None:
+            indices = []
+            mask = self.mask
+            offset = self.offset - 1
+            while mask:
+                low = mask & -mask
+                indices.append(offset + low.bit_length())
+                mask ^= low
+            self.indices = indices
+        return self.indices
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __eq__(self, other):
+        return self.freeze() == other.freeze()
+
+    def __str__(self):
+        return f"{set(self.cells)} = {self.count}"
+
+    def to_sentence(self):
+        """
+        Returns the equivalent Sentence over (i, j) tuples.
+        """
+        return Sentence(self.cells, self.count)
+
+    def freeze(self):
+        return self.mask, self.count, self.offset
+
+    def within(self, other):
+
+        # A subset cannot start before the set it is in
+        shift = self.offset - other.offset
+        if shift < 0:
+            return False
+        mask = self.mask << shift
+        return mask != other.mask and mask & other.mask == mask
+
+    def minus(self, other):
+        shift = other.offset - self.offset
+        if shift >= 0:
+            mask = self.mask & ~(other.mask << shift)
+        else:
+            mask = self.mask & ~(other.mask >> -shift)
+        return BitSentence.from_mask(
+            mask, self.count - other.count, self.width, self.offset
+        )
+
+    def known_mines(self):
+        if self.mask.bit_count() == self.count:
+            return self.cells
+        return set()
+
+    def known_safes(self):
+        if self.count == 0:
+            return self.cells
+        return set()
+
+    def mark_mine(self, cell):
+        if self.drop(cell):
+            self.count -= 1
+
+    def mark_safe(self, cell):
+        self.drop(cell)
+
+    def drop(self, cell):
+        """
+        Takes `cell` out of the sentence, keeping the decoded bit indices
+        up to date. Returns whether it was there.
+        """
+        index = cell[0] * self.width + cell[1] - self.offset
+        if index < 0 or not self.mask >> index & 1:
+            return False
+        indices = self.indices
+        if index:
+            self.mask ^= 1 << index
+        else:
+            self.set_mask(self.mask ^ 1, self.offset)
+        if indices is not None:
+            indices.remove(cell[0] * self.width + cell[1])
+            self.indices = indices
+        return True
+
+
+class KnowledgeBase():
+    """
+    Sentences known to be true, indexed by the cells they mention.
+
+    Each sentence gets an id, and every cell maps to the ids of the
+    sentences containing it, so inference can look up only the sentences
+    that share cells with a change. Cells are indexed under the keys each
+    sentence reports: (i, j) tuples for Sentence, bit indices for
+    BitSentence. Sentences are deduplicated by their frozen form, and
+    empty sentences are dropped.
+
+    Cells are also grouped into connected components, two cells being
+    connected when some sentence mentions both, with a union-find forest.
+    Adding a sentence merges components; removing one may split its
+    component, which is then only marked stale and rebuilt from its own
+    sentences the next time components are asked for.
+    """
+
+    def __init__(self):
+        self.sentences = dict()
+        self.ids = dict()
+        self.cells = dict()
+        self.next_id = 0
+
+        # Union-find parent of each cell, and the cells under each root
+        self.parent = dict()
+        self.members = dict()
+
+        # Roots of components that may have split since they were built
+        self.stale = set()
+
+    def __iter__(self):
+        return iter(list(self.sentences.values()))
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __contains__(self, sentence):
+        return sentence.freeze() in self.ids
+
+    def add(self, sentence):
+        """
+        Adds a sentence unless it is empty or already known.
+        Returns the id of the new sentence, or None.
+        """
+        key = sentence.freeze()
+        if not key[0] or key in self.ids:
+            return None
+        id = self.next_id
+        self.next_id += 1
+        self.sentences[id] = sentence
+        self.ids[key] = id
+        for cell in sentence.keys():
+            self.cells.setdefault(cell, set()).add(id)
+        self.join(sentence.keys())
+        return id
+
+    def sharing(self, sentence):
+        """
+        Returns the sentences that share any cell with `sentence`.
+        """
+        ids = set()
+        for cell in sentence.keys():
+            ids |= self.cells.get(cell, set())
+        return [self.sentences[id] for id in ids]
+
+    def find(self, cell):
+        """
+        Returns the root of the component containing `cell`.
+        """
+        parent = self.parent
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    def join(self, cells):
+        """
+        Merges the components of all `cells`, moving the smaller
+        component's members into the larger one each time.
+        """
+        root = None
+        for cell in cells:
+            if cell not in self.parent:
+                self.parent[cell] = cell
+                self.members[cell] = {cell}
+            other = self.find(cell)
+            if root is None or other == root:
+                root = other
+                continue
+            if len(self.members[root]) < len(self.members[other]):
+                root, other = other, root
+            self.parent[other] = root
+            self.members[root] |= self.members.pop(other)
+
+    def rebuild(self):
+        """
+        Rebuilds stale components from the sentences still in them.
+        Every sentence touching a stale component lies entirely inside
+        it, so the rest of the forest is left alone.
+        """
+        roots = {self.find(root) for root in self.stale}
+        self.stale.clear()
+        cells = set()
+        for root in roots:
+            cells |= self.members.pop(root)
+        for cell in cells:
+            del self.parent[cell]
+        ids = set()
+        for cell in cells:
+            ids |= self.cells.get(cell, set())
+        for id in ids:
+            self.join(self.sentences[id].keys())
+
+    def component(self, cell):
+        """
+        Returns the sentences in the component containing the cell
+        indexed under `cell`.
+        """
+        if self.stale:
+            self.rebuild()
+        if cell not in self.parent:
+            return []
+        ids = set()
+        for member in self.members[self.find(cell)]:
+            ids |= self.cells[member]
+        return [self.sentences[id] for id in ids]
+
+    def components(self, cells=None):
+        """
+        Returns the sentences grouped by component, only for the
+        components containing any of `cells` if given.
+        """
+        if self.stale:
+            self.rebuild()
+        if cells is None:
+            roots = list(self.members)
+        else:
+            roots = {self.find(cell) for cell in cells if cell in self.parent}
+        return [self.component(root) for root in roots]
+
+    def update(self, cell, change):
+        """
+        Applies `change`, which takes the cell indexed under `cell` out of
+        a sentence, to every sentence containing that cell.
+        Returns the ids of the updated sentences still in the knowledge base.
+
+        Only the entry for `cell` is taken out of the index. A sentence
+        left empty, or equal to one already known, is removed altogether.
+        The component the cell was in may split, so it is marked stale.
+        """
+        ids = set()
+        updated = self.cells.pop(cell, set())
+        if updated:
+            self.stale.add(self.find(cell))
+        for id in updated:
+            sentence = self.sentences[id]
+            del self.ids[sentence.freeze()]
+            change(sentence)
+            key = sentence.freeze()
+            if not key[0] or key in self.ids:
+                del self.sentences[id]
+                for other in sentence.keys():
+                    self.cells[other].discard(id)
+                    if not self.cells[other]:
+                        del self.cells[other]
+                continue
+            self.ids[key] = id
+            ids.add(id)
+        return ids
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, bitset=False, mines=None, inference="subset"):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known
+        self.total_mines = mines
+
+        # Store sentence cells as integer bitmasks instead of sets
+        self.bitset = bitset
+
+        # How sentences are combined, one of INFERENCE
+        if inference not in INFERENCE:
+            raise ValueError(f"inference must be one of {INFERENCE}")
+        self.inference = inference
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -171,8 +556,23 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true
+        self.knowledge = KnowledgeBase()
+        
+        # Ids of sentences that changed and must be looked at again
+        self.pending = collections.deque()
+        
+        # Cells of sentences propagated since the last elimination
+        self.touched = set()
+        
+        # Counters for the most recent move
+        self.stats = {"propagations": 0, "inferences": 0, "eliminations": 0}
+        
+        # Mine probabilities for when no move is certain to be safe
+        self.solver = ProbabilitySolver()
+        
+        # Every (cell, count) given to add_knowledge, so games can be replayed
+        self.log = []
 
     def mark_mine(self, cell):
         """
@@ -180,11 +580,11 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
         
-        # Add known mine to knowledge
-        self.knowledge.append(Sentence({cell}, 1))
+        # Sentences that lost the cell must be looked at again
+        self.pending.extend(self.knowledge.update(
+            self.key(cell), lambda sentence: sentence.mark_mine(cell)
+        ))
 
     def mark_safe(self, cell):
         """
@@ -192,11 +592,11 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
-            
-        # Add known safe to knowledge
-        self.knowledge.append(Sentence({cell}, 0))
+        
+        # Sentences that lost the cell must be looked at again
+        self.pending.extend(self.knowledge.update(
+            self.key(cell), lambda sentence: sentence.mark_safe(cell)
+        ))
 
     def add_knowledge(self, cell, count):
         """
@@ -214,86 +614,147 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
         
+        # Count the work done for this move
+        self.stats = {"propagations": 0, "inferences": 0, "eliminations": 0}
+        self.log.append((cell, count))
+        
         # 1) mark the cell as a move that has been made
         self.moves_made.add(cell)
         
         # 2) mark the cell as safe
         self.mark_safe(cell)
         
-        # 3)
-        cells = self.surrounding_cells(cell)
-        newSentence = Sentence(cells, count)
-        self.knowledge.append(newSentence)
-        
-        # 5) Here I switch the order of `4)` and `5)`
-        #    I want it to figure out new safe and mine cells firstly, and mark them subsequently
-        newInfers = list()
-        newNewinfers = list()
-        tempCells = set()
-
-        # If new-added sentence is easily known(all safes or all mines), then simply tear it apart as infers
-        if len(newSentence.known_mines()) > 0:
-            tempCells = newSentence.known_mines().copy()
-            for tempCell in tempCells:
-                self.mark_mine(tempCell)
-                newInfers.append(Sentence({tempCell}, 1))
-        elif len(newSentence.known_safes()) > 0:
-            tempCells = newSentence.known_safes().copy()
-            for tempCell in tempCells:
-                self.mark_safe(tempCell)
-                newInfers.append(Sentence({tempCell}, 0))
-        else:
-            # Use new-added sentence to infer new sentences
-            newInfers = self.infer_sentence(newSentence)
-        
-        # If newInfer is new to knowledge, then add it to knowledge
-        for newInfer in newInfers:
-            if not newInfer in self.knowledge:
-                self.knowledge.append(newInfer)
-        
-        # Arrange knowledge before starting deep exploration
-        self.unique_knowledge()
-        
-        # Conduct second infer to explore deeper
-        # Use newly-inferred sentences to infer new sentences
-        for i in range(8):
-            for ni in newInfers:
-                newNewinfers = self.infer_sentence(ni)
-                
-                for newInfer in newNewinfers:
-                    if not newInfer in self.knowledge:
-                        self.knowledge.append(newInfer)
-            newInfers = copy.deepcopy(newNewinfers)
-        
-        # Arrange knowledge before marking cells
-        self.unique_knowledge()
-        
-        # 4)
-        safeCells = set()
-        mineCells = set()
+        # 3) only cells not yet known go into the sentence
+        cells = set()
+        for c in self.surrounding_cells(cell):
+            if c in self.mines:
+                count -= 1
+            elif c not in self.safes:
+                cells.add(c)
+        id = self.knowledge.add(self.new_sentence(cells, count))
+        if id is not None:
+            self.pending.append(id)
         
-        # Loop to find all known mines and safes
-        for sentence in self.knowledge:
-            tempCells = sentence.known_mines()
-            if len(tempCells) != 0:
-                mineCells |= tempCells
+        # 4) and 5) are done together until nothing changes
+        self.propagate()
+        if self.inference == "linear":
+            self.eliminate()
+        self.touched.clear()
+
+    def snapshot(self):
+        """
+        Returns the AI's state as a dict of plain numbers and lists,
+        ready for json. Cells are written as their index i * width + j.
+        """
+        def index(cell):
+            return cell[0] * self.width + cell[1]
+
+        return {
+            "height": self.height,
+            "width": self.width,
+            "bitset": self.bitset,
+            "mines": self.total_mines,
+            "inference": self.inference,
+            "moves_made": sorted(map(index, self.moves_made)),
+            "known_mines": sorted(map(index, self.mines)),
+            "safes": sorted(map(index, self.safes)),
+            "knowledge": [[sorted(map(index, sentence.cells)), sentence.count]
+                          for sentence in self.knowledge],
+            "log": [[index(cell), count] for cell, count in self.log]
+        }
+
+    @classmethod
+    def restore(cls, snapshot):
+        """
+        Returns an AI in the state captured by `snapshot`.
+        Sentences are added in their original order, and the move log
+        is kept so the game can be replayed from the start.
+        """
+        width = snapshot["width"]
+        ai = cls(height=snapshot["height"], width=width,
+                 bitset=snapshot["bitset"], mines=snapshot["mines"],
+                 inference=snapshot.get("inference", "subset"))
+        ai.moves_made = {divmod(i, width) for i in snapshot["moves_made"]}
+        ai.mines = {divmod(i, width) for i in snapshot["known_mines"]}
+        ai.safes = {divmod(i, width) for i in snapshot["safes"]}
+        for cells, count in snapshot["knowledge"]:
+            ai.knowledge.add(ai.new_sentence({divmod(i, width) for i in cells}, count))
+        ai.log = [(divmod(i, width), count) for i, count in snapshot["log"]]
+        return ai
+
+    def key(self, cell):
+        """
+        Returns the key the knowledge base indexes `cell` under.
+        """
+        if self.bitset:
+            return cell[0] * self.width + cell[1]
+        return cell
+
+    def new_sentence(self, cells, count):
+        """
+        Returns a sentence in the representation this AI uses.
+        """
+        if self.bitset:
+
+            # Start the mask at the first cell, so it is a few rows wide
+            # rather than as wide as the board
+            offset = min((i * self.width + j for i, j in cells), default=0)
+            return BitSentence(cells, count, self.width, offset=offset)
+        return Sentence(cells, count)
+
+    def propagate(self):
+        """
+        Processes pending sentences until a fixed point is reached.
+
+        A pending sentence whose cells are all mines or all safe gets its
+        cells marked, which makes every sentence sharing those cells
+        pending again. Otherwise it is compared with the sentences sharing
+        its cells, and any new subset inferences become pending.
+        """
+        while self.pending:
+            id = self.pending.popleft()
+            sentence = self.knowledge.sentences.get(id)
             
-            tempCells = sentence.known_safes()
-            if len(tempCells) != 0:
-                safeCells |= tempCells
-        
-        # Mark all mines and safes
-        for c in mineCells:
-            self.mark_mine(c)
-        for c in safeCells:
-            self.mark_safe(c)
+            # The sentence was dropped since it was queued
+            if sentence is None:
+                continue
+            self.stats["propagations"] += 1
             
-        # Delete repetitive sentences from knowledge
-        self.unique_knowledge()
-        
-        return
-                
-        raise NotImplementedError
+            mines = sentence.known_mines()
+            safes = sentence.known_safes()
+            if mines or safes:
+                for c in list(mines):
+                    self.mark_mine(c)
+                for c in list(safes):
+                    self.mark_safe(c)
+                continue
+            self.touched.add(next(iter(sentence.keys())))
+            
+            for newSentence in self.infer_sentence(sentence):
+                id = self.knowledge.add(newSentence)
+                if id is not None:
+                    self.stats["inferences"] += 1
+                    self.pending.append(id)
+
+    def eliminate(self):
+        """
+        Runs linear elimination over every component holding a sentence
+        propagated since the last elimination, marking the safes and mines
+        it derives and propagating again, until nothing new is found.
+        """
+        while self.touched:
+            touched = self.touched
+            self.touched = set()
+            for component in self.knowledge.components(touched):
+                self.stats["eliminations"] += 1
+                safes, mines = linear.deduce(
+                    [(sentence.cells, sentence.count) for sentence in component]
+                )
+                for c in mines - self.mines:
+                    self.mark_mine(c)
+                for c in safes - self.safes:
+                    self.mark_safe(c)
+            self.propagate()
 
     def make_safe_move(self):
         """
@@ -320,9 +781,10 @@ class MinesweeperAI():
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Chooses among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        the one least likely to be a mine, breaking ties randomly.
         """
         
         # Get a set of cells, which is NOT a mine cell and has not been made a move
@@ -333,58 +795,35 @@ class MinesweeperAI():
         if len(targetCells) == 0:
             return None
         
-        # Pick a cell arbitrarily, and make a move on it
-        randomCell = (random.randrange(self.height), random.randrange(self.width))
-        while(not randomCell in targetCells):
-            randomCell = (random.randrange(self.height), random.randrange(self.width))
-        return randomCell
-    
-        raise NotImplementedError
+        # Every sentence only mentions cells that are not known yet
+        components = [
+            [(frozenset(s.cells), s.count) for s in component]
+            for component in self.knowledge.components()
+        ]
+        minesLeft = None
+        if self.total_mines is not None:
+            minesLeft = self.total_mines - len(self.mines)
+        return self.solver.safest(components, targetCells, minesLeft)
 
     def surrounding_cells(self, cell):
         """
         Returns a set of cells that surround `cell`
         """
-        cells = set()
-        x = cell[0]; y = cell[1]
-        
-        # Recognize valid cells and add them to the set
-        for i in range(3):
-            if (x - 1 + i) < 0 or (x - 1 + i) > self.height - 1:
-                continue
-            for j in range(3):
-                if (y - 1 + j) < 0 or (y - 1 + j) > self.width - 1:
-                    continue
-                
-                # Ignore the cell itself
-                if i == 1 and j == 1:
-                    continue
-                
-                # Add surrouding cells to set
-                cells.add((x - 1 + i, y - 1 + j))
-        
-        return cells
+        return neighbors(cell, self.height, self.width)
     
     def infer_sentence(self, sentence):
         newSentences = list()
 
         # if one sentence is a subset of another sentence, then we can infer new sentence
-        for s in self.knowledge:
-            if s.cells < sentence.cells:
-                newSentences.append(Sentence(sentence.cells - s.cells, sentence.count - s.count))
-            elif sentence.cells < s.cells:
-                newSentences.append(Sentence(s.cells - sentence.cells, s.count - sentence.count))
+        # only sentences sharing a cell with `sentence` can be its subset or superset
+        for s in self.knowledge.sharing(sentence):
+            if s.within(sentence):
+                newSentences.append(sentence.minus(s))
+            elif sentence.within(s):
+                newSentences.append(s.minus(sentence))
 
         return newSentences
     
-    def unique_knowledge(self):
-        """
-        Make the knowledge unique
-        """
-        uniqueKnowledge = list()
-        [uniqueKnowledge.append(item) for item in self.knowledge if item not in uniqueKnowledge]
-        self.knowledge = copy.deepcopy(uniqueKnowledge)
-    
     
 '''def main():
     safe = {(0, 0), (0, 1)}
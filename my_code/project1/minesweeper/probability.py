@@ -0,0 +1,312 @@
+import collections
+import math
+import random
+import time
+
+# Largest number of component results kept between moves
+CACHE_SIZE = 4096
+
+# Number of search steps between checks of the time budget
+CHECK_INTERVAL = 1024
+
+# Relative difference below which two probabilities count as tied
+TIE_TOLERANCE = 1e-9
+
+
+class OutOfTime(Exception):
+    pass
+
+
+class ProbabilitySolver():
+    """
+    Computes the probability that each unknown cell is a mine.
+
+    Constraints are (cells, count) pairs saying exactly `count` of
+    `cells` are mines. They come grouped into independent components that
+    share no cells, and each component's consistent mine configurations
+    are counted by backtracking. Counts are cached by component, so
+    components left untouched by a move are not enumerated again.
+    """
+
+    def __init__(self, budget=0.1):
+
+        # Seconds each call to `solve` may spend enumerating
+        self.budget = budget
+
+        # Component constraints -> (configurations, mine hits) by mine count
+        self.cache = dict()
+
+    def solve(self, components, unknown, mines_left=None):
+        """
+        Returns a dict mapping every cell in `unknown` to its probability
+        of being a mine.
+
+        `components` is a list of constraint lists, one per group of
+        constraints connected by shared cells, such as the knowledge base's
+        components, and only mentions cells in `unknown`. If `mines_left`,
+        the number of mines among `unknown`, is given, configurations are
+        weighted by the number of ways to place the remaining mines in
+        unconstrained cells. If a component cannot be enumerated within
+        the time budget, its cells fall back to local estimates and no
+        global weighting is applied.
+        """
+        deadline = time.perf_counter() + self.budget
+        constraints = [constraint for component in components
+                       for constraint in component]
+        frontier = set().union(*(cells for cells, _ in constraints))
+        others = [cell for cell in unknown if cell not in frontier]
+
+        results = []
+        for component in components:
+            key = frozenset(component)
+            if key not in self.cache:
+                try:
+                    self.cache[key] = enumerate_component(component, deadline)
+                except OutOfTime:
+                    self.cache.pop(key, None)
+                    results.append((component, None))
+                    continue
+                if len(self.cache) > CACHE_SIZE:
+                    self.cache.pop(next(iter(self.cache)))
+            results.append((component, self.cache[key]))
+
+        exact = all(result is not None for _, result in results)
+        if exact and mines_left is not None:
+            probabilities = weigh(results, len(others), mines_left)
+        else:
+            probabilities = dict()
+            for component, result in results:
+                probabilities.update(
+                    marginals(component, result) if result is not None
+                    else estimate(component)
+                )
+            probabilities[None] = density(constraints, unknown, mines_left)
+
+        default = probabilities.pop(None)
+        for cell in others:
+            probabilities[cell] = default
+        return probabilities
+
+    def safest(self, components, unknown, mines_left=None):
+        """
+        Returns a cell from `unknown` with the lowest probability of
+        being a mine, choosing randomly among ties.
+        """
+        if not unknown:
+            return None
+        probabilities = self.solve(components, unknown, mines_left)
+
+        # Ties are the probabilities within TIE_TOLERANCE of the lowest,
+        # found in one pass and picked from without sorting the board
+        limit = min(probabilities.values()) * (1 + TIE_TOLERANCE)
+        return random.choice([
+            cell for cell, p in probabilities.items() if p <= limit
+        ])
+
+
+def enumerate_component(component, deadline):
+    """
+    Counts the mine configurations consistent with every constraint
+    in `component`.
+
+    Returns (configurations, hits): configurations[k] is the number of
+    consistent configurations with k mines, and hits[k][cell] is how many
+    of those have a mine in `cell`. Raises OutOfTime past `deadline`.
+    """
+
+    # Order cells so that each one shares constraints with earlier ones,
+    # which lets constraints fail early
+    constraints = list(component)
+    touching = dict()
+    for index, (cells, _) in enumerate(constraints):
+        for cell in cells:
+            touching.setdefault(cell, []).append(index)
+    order = []
+    seen = set()
+    visited = {0}
+    queue = collections.deque([0])
+    while queue:
+        cells, _ = constraints[queue.popleft()]
+        for cell in sorted(cells):
+            if cell not in seen:
+                seen.add(cell)
+                order.append(cell)
+                for index in touching[cell]:
+                    if index not in visited:
+                        visited.add(index)
+                        queue.append(index)
+
+    # Mines still needed and cells still unassigned per constraint
+    needed = [count for _, count in constraints]
+    free = [len(cells) for cells, _ in constraints]
+
+    configurations = dict()
+    hits = dict()
+    values = []
+    steps = 0
+
+    def assign(cell, value):
+        """Assigns a cell, returning False if a constraint breaks."""
+        ok = True
+        for index in touching[cell]:
+            free[index] -= 1
+            needed[index] -= value
+            if needed[index] < 0 or needed[index] > free[index]:
+                ok = False
+        return ok
+
+    def unassign(cell, value):
+        for index in touching[cell]:
+            free[index] += 1
+            needed[index] += value
+
+    # Depth-first search with an explicit stack of values tried so far
+    while True:
+        steps += 1
+        if steps % CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+            raise OutOfTime
+
+        if len(values) == len(order):
+            mines = sum(values)
+            configurations[mines] = configurations.get(mines, 0) + 1
+            counts = hits.setdefault(mines, dict())
+            for cell, value in zip(order, values):
+                if value:
+                    counts[cell] = counts.get(cell, 0) + 1
+            advance = True
+        else:
+            values.append(0)
+            advance = not assign(order[len(values) - 1], 0)
+
+        # Move to the next untried value, backtracking as needed
+        while advance:
+            if not values:
+                return configurations, hits
+            cell = order[len(values) - 1]
+            value = values.pop()
+            unassign(cell, value)
+            if value == 0:
+                values.append(1)
+                advance = not assign(cell, 1)
+
+
+def marginals(component, result):
+    """
+    Returns each cell's mine probability within its own component,
+    ignoring how many mines are left on the board.
+    """
+    configurations, hits = result
+    total = sum(configurations.values())
+    if not total:
+        return estimate(component)
+    probabilities = {cell: 0 for cells, _ in component for cell in cells}
+    for counts in hits.values():
+        for cell, count in counts.items():
+            probabilities[cell] += count
+    return {cell: count / total for cell, count in probabilities.items()}
+
+
+def estimate(component):
+    """
+    Returns a rough mine probability per cell, the highest density of
+    any constraint containing it, for components too large to enumerate.
+    """
+    probabilities = dict()
+    for cells, count in component:
+        for cell in cells:
+            probabilities[cell] = max(probabilities.get(cell, 0),
+                                      count / len(cells))
+    return probabilities
+
+
+def density(constraints, unknown, mines_left):
+    """
+    Returns the mine probability assumed for unconstrained cells when
+    exact weighting is not possible.
+    """
+    if mines_left is not None and unknown:
+        return mines_left / len(unknown)
+    cells = sum(len(cells) for cells, _ in constraints)
+    mines = sum(count for _, count in constraints)
+    return mines / cells if cells else 0.5
+
+
+def weigh(results, others, mines_left):
+    """
+    Combines exact component counts into mine probabilities, weighting
+    every choice of mines per component by the ways to place the mines
+    left over among `others` unconstrained cells.
+
+    Counts and ways are handled as logarithms, since the ways to place
+    mines on a large board are far too large to compute exactly.
+    """
+    distributions = [
+        {mines: math.log(count) for mines, count in configurations.items() if count}
+        for _, (configurations, _) in results
+    ]
+
+    def combine(a, b):
+        """Convolves two log counts by total number of mines."""
+        merged = dict()
+        for x, p in a.items():
+            for y, q in b.items():
+                if x + y <= mines_left:
+                    merged.setdefault(x + y, []).append(p + q)
+        return {mines: log_sum(values) for mines, values in merged.items()}
+
+    # Log counts of every component but one, from the ones before it
+    # and the ones after it, so each component needs two convolutions
+    before = [{0: 0.0}]
+    for distribution in distributions:
+        before.append(combine(before[-1], distribution))
+    after = [{0: 0.0}]
+    for distribution in reversed(distributions[1:]):
+        after.append(combine(after[-1], distribution))
+    after.reverse()
+
+    def log_ways(mines):
+        """Log of the ways to place the remaining mines among unconstrained cells."""
+        rest = mines_left - mines
+        if not 0 <= rest <= others:
+            return None
+        return (math.lgamma(others + 1) - math.lgamma(rest + 1)
+                - math.lgamma(others - rest + 1))
+
+    ways = {mines: log_ways(mines) for mines in before[-1]}
+    ways = {mines: value for mines, value in ways.items() if value is not None}
+    if not ways:
+        return {None: 0.0, **{
+            cell: 0.0 for component, _ in results
+            for cells, _ in component for cell in cells
+        }}
+    total = log_sum([before[-1][mines] + value for mines, value in ways.items()])
+
+    probabilities = dict()
+    for index, (component, (_, hits)) in enumerate(results):
+        rest = combine(before[index], after[index])
+        for mines, counts in hits.items():
+            terms = [value + ways[mines + other] for other, value in rest.items()
+                     if mines + other in ways]
+            if not terms:
+                continue
+            weight = log_sum(terms) - total
+            for cell, count in counts.items():
+                probabilities[cell] = (probabilities.get(cell, 0)
+                                       + math.exp(math.log(count) + weight))
+        for cells, _ in component:
+            for cell in cells:
+                probabilities.setdefault(cell, 0)
+
+    # Expected share of the leftover mines in each unconstrained cell
+    expected = sum(math.exp(before[-1][mines] + value - total) * (mines_left - mines)
+                   for mines, value in ways.items())
+    probabilities[None] = expected / others if others else 0.0
+    return probabilities
+
+
+def log_sum(values):
+    """
+    Returns the logarithm of the sum of the exponentials of `values`.
+    """
+    largest = max(values)
+    return largest + math.log(sum(math.exp(value - largest) for value in values))
@@ -0,0 +1,123 @@
+import json
+import statistics
+import sys
+import time
+
+from minesweeper import MinesweeperAI
+from simulate import play
+
+# Number of slowest moves to list after a replay
+SLOWEST = 5
+
+# Default number of times to rerun a single move
+REPEAT = 20
+
+
+def main():
+    if len(sys.argv) == 7 and sys.argv[1] == "record":
+        seed, height, width, mines = map(int, sys.argv[2:6])
+        ai = record(seed, height, width, mines)
+        save(ai, sys.argv[6])
+        print(f"Saved {len(ai.log)} moves to {sys.argv[6]}")
+        return
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python replay.py snapshot.json [step] [repeat]\n"
+                 "       python replay.py record seed height width mines snapshot.json")
+
+    snapshot = load(sys.argv[1])
+
+    # Replay the whole game, listing the slowest moves
+    if len(sys.argv) == 2:
+        timings = replay(snapshot)
+        print(f"Replayed {len(timings)} moves in {sum(t for t, _ in timings):.4f}s")
+        slowest = sorted(range(len(timings)), key=lambda step: -timings[step][0])
+        for step in slowest[:SLOWEST]:
+            seconds, size = timings[step]
+            cell, count = snapshot["log"][step]
+            print(f"  step {step}: cell {divmod(cell, snapshot['width'])} = {count}, "
+                  f"{seconds * 1000:.3f}ms, {size} sentences after")
+        return
+
+    # Rerun a single move from the state just before it
+    step = int(sys.argv[2])
+    repeat = int(sys.argv[3]) if len(sys.argv) == 4 else REPEAT
+    if not 0 <= step < len(snapshot["log"]):
+        sys.exit(f"Step must be between 0 and {len(snapshot['log']) - 1}")
+    times = benchmark(snapshot, step, repeat)
+    print(f"Step {step} over {repeat} runs: min {min(times) * 1000:.3f}ms, "
+          f"median {statistics.median(times) * 1000:.3f}ms")
+
+
+def save(ai, filename):
+    """
+    Writes a snapshot of `ai` to a json file.
+    """
+    with open(filename, "w") as f:
+        json.dump(ai.snapshot(), f, separators=(",", ":"))
+
+
+def load(filename):
+    """
+    Reads a snapshot written by `save`.
+    """
+    with open(filename) as f:
+        return json.load(f)
+
+
+def record(seed, height, width, mines):
+    """
+    Plays the seeded game from simulate.py and returns the AI at its end,
+    with every move in its log.
+    """
+    ai = MinesweeperAI(height=height, width=width, mines=mines)
+    play(seed, height, width, mines, ai=ai)
+    return ai
+
+
+def fresh(snapshot):
+    """
+    Returns a new AI with the same settings as `snapshot`.
+    """
+    return MinesweeperAI(height=snapshot["height"], width=snapshot["width"],
+                         bitset=snapshot["bitset"], mines=snapshot["mines"],
+                         inference=snapshot.get("inference", "subset"))
+
+
+def replay(snapshot):
+    """
+    Re-runs `add_knowledge` for every move in the snapshot's log on a
+    fresh AI.
+    Returns the seconds and resulting knowledge base size of each move.
+    """
+    ai = fresh(snapshot)
+    timings = []
+    for index, count in snapshot["log"]:
+        start = time.perf_counter()
+        ai.add_knowledge(divmod(index, snapshot["width"]), count)
+        timings.append((time.perf_counter() - start, len(ai.knowledge)))
+    return timings
+
+
+def benchmark(snapshot, step, repeat=REPEAT):
+    """
+    Times move `step` of the snapshot's log `repeat` times, each time on
+    an AI restored to the state just before that move.
+    """
+    ai = fresh(snapshot)
+    for index, count in snapshot["log"][:step]:
+        ai.add_knowledge(divmod(index, snapshot["width"]), count)
+    before = ai.snapshot()
+
+    index, count = snapshot["log"][step]
+    cell = divmod(index, snapshot["width"])
+    times = []
+    for _ in range(repeat):
+        ai = MinesweeperAI.restore(before)
+        start = time.perf_counter()
+        ai.add_knowledge(cell, count)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import pygame
+import queue
 import sys
+import threading
 import time
 
 from minesweeper import Minesweeper, MinesweeperAI
@@ -37,15 +39,59 @@ flag = pygame.transform.scale(flag, (cell_size, cell_size))
 mine = pygame.image.load("assets/images/mine.png")
 mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
+
+def think(ai, requests, results):
+    """
+    Runs the AI in a background thread so the window keeps drawing
+    while it reasons. Only this thread touches `ai`: it takes
+    ("learn", cell, count) and ("move",) requests in order, and puts
+    ("learned", seconds) and ("move", cell, safe, mines, seconds)
+    results. A None request stops the thread.
+    """
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+        start = time.perf_counter()
+        if request[0] == "learn":
+            _, cell, count = request
+            ai.add_knowledge(cell, count)
+            results.put(("learned", time.perf_counter() - start))
+        else:
+            move = ai.make_safe_move()
+            safe = move is not None
+            if move is None:
+                move = ai.make_random_move()
+            results.put(("move", move, safe, ai.mines.copy(),
+                         time.perf_counter() - start))
+
+
+def start_ai():
+    """
+    Starts a new AI in its own thread and returns its request and
+    result queues.
+    """
+    requests = queue.Queue()
+    results = queue.Queue()
+    ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
+    threading.Thread(target=think, args=(ai, requests, results), daemon=True).start()
+    return requests, results
+
+
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+requests, results = start_ai()
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
 flags = set()
 lost = False
 
+# Whether the AI is choosing a move, plays on its own, and its last think time
+thinking = False
+autoplay = False
+thinkTime = None
+
 # Show instructions initially
 instructions = True
 
@@ -152,15 +198,62 @@ while True:
     pygame.draw.rect(screen, WHITE, resetButton)
     screen.blit(buttonText, buttonRect)
 
+    # Autoplay button
+    autoButton = pygame.Rect(
+        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 90,
+        (width / 3) - BOARD_PADDING * 2, 50
+    )
+    buttonText = mediumFont.render("Stop" if autoplay else "Autoplay", True, BLACK)
+    buttonRect = buttonText.get_rect()
+    buttonRect.center = autoButton.center
+    pygame.draw.rect(screen, WHITE, autoButton)
+    screen.blit(buttonText, buttonRect)
+
     # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
+    won = game.mines == flags
+    text = "Lost" if lost else "Won" if won else "Thinking..." if thinking else ""
     text = mediumFont.render(text, True, WHITE)
     textRect = text.get_rect()
-    textRect.center = ((5 / 6) * width, (2 / 3) * height)
+    textRect.center = ((5 / 6) * width, (2 / 3) * height + 40)
     screen.blit(text, textRect)
 
+    # Display how long the AI took for its last move
+    if thinkTime is not None:
+        text = smallFont.render(f"Think time: {thinkTime * 1000:.1f} ms", True, WHITE)
+        textRect = text.get_rect()
+        textRect.center = ((5 / 6) * width, (2 / 3) * height + 80)
+        screen.blit(text, textRect)
+
     move = None
 
+    # Collect whatever the AI has finished
+    while True:
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            break
+        if result[0] == "learned":
+            thinkTime = (thinkTime or 0) + result[1]
+            continue
+        _, move, safe, mines, thinkTime = result
+        thinking = False
+        if move is None:
+            flags = mines
+            autoplay = False
+            print("No moves left to make.")
+        elif safe:
+            print("AI making safe move.")
+        else:
+            print("No known safe moves, AI making random move.")
+
+    # Keep asking for moves while autoplaying
+    if autoplay and not thinking and not move:
+        if lost or won:
+            autoplay = False
+        else:
+            requests.put(("move",))
+            thinking = True
+
     left, _, right = pygame.mouse.get_pressed()
 
     # Check for a right-click to toggle flagging
@@ -175,34 +268,36 @@ while True:
                         flags.add((i, j))
                     time.sleep(0.2)
 
-    elif left == 1:
+    elif left == 1 and not move:
         mouse = pygame.mouse.get_pos()
 
-        # If AI button clicked, make an AI move
+        # If AI button clicked, ask the AI for a move
         if aiButton.collidepoint(mouse) and not lost:
-            move = ai.make_safe_move()
-            if move is None:
-                move = ai.make_random_move()
-                if move is None:
-                    flags = ai.mines.copy()
-                    print("No moves left to make.")
-                else:
-                    print("No known safe moves, AI making random move.")
-            else:
-                print("AI making safe move.")
+            if not thinking:
+                requests.put(("move",))
+                thinking = True
             time.sleep(0.2)
 
-        # Reset game state
+        # Toggle playing at full speed
+        elif autoButton.collidepoint(mouse) and not lost:
+            autoplay = not autoplay
+            time.sleep(0.2)
+
+        # Reset game state, leaving the old AI thread to finish and stop
         elif resetButton.collidepoint(mouse):
+            requests.put(None)
             game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+            requests, results = start_ai()
             revealed = set()
             flags = set()
             lost = False
+            thinking = False
+            autoplay = False
+            thinkTime = None
             continue
 
-        # User-made move
-        elif not lost:
+        # User-made move, unless the AI is about to move
+        elif not lost and not thinking:
             for i in range(HEIGHT):
                 for j in range(WIDTH):
                     if (cells[i][j].collidepoint(mouse)
@@ -210,6 +305,10 @@ while True:
                             and (i, j) not in revealed):
                         move = (i, j)
 
+            # Only time the AI takes to learn from the user's move
+            if move:
+                thinkTime = 0
+
     # Make move and update AI knowledge
     if move:
         if game.is_mine(move):
@@ -217,6 +316,6 @@ while True:
         else:
             nearby = game.nearby_mines(move)
             revealed.add(move)
-            ai.add_knowledge(move, nearby)
+            requests.put(("learn", move, nearby))
 
     pygame.display.flip()
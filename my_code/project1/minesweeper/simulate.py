@@ -0,0 +1,124 @@
+import concurrent.futures
+import os
+import random
+import statistics
+import sys
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Default board, matching runner.py
+HEIGHT = 8
+WIDTH = 8
+MINES = 8
+
+# Number of move numbers to report the knowledge base size at
+KB_SAMPLES = 10
+
+
+def main():
+    if len(sys.argv) not in range(2, 7):
+        sys.exit("Usage: python simulate.py games [height] [width] [mines] [processes]")
+
+    games = int(sys.argv[1])
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else HEIGHT
+    width = int(sys.argv[3]) if len(sys.argv) > 3 else WIDTH
+    mines = int(sys.argv[4]) if len(sys.argv) > 4 else MINES
+    processes = int(sys.argv[5]) if len(sys.argv) > 5 else None
+
+    start = time.perf_counter()
+    results = simulate(games, height, width, mines, processes)
+    seconds = time.perf_counter() - start
+
+    report(results, seconds)
+
+
+def play(seed, height=HEIGHT, width=WIDTH, mines=MINES, ai=None):
+    """
+    Plays one game with the given seed until the AI wins, hits a mine
+    or runs out of moves. A fresh AI is used unless `ai` is given.
+
+    Returns whether the game was won, the seconds the AI took for each
+    move (choosing it and adding what it revealed to its knowledge), and
+    the knowledge base size after each move.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    if ai is None:
+        ai = MinesweeperAI(height=height, width=width, mines=mines)
+    revealed = 0
+    latencies = []
+    sizes = []
+
+    while True:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if move is None or game.is_mine(move):
+            latencies.append(time.perf_counter() - start)
+            break
+        ai.add_knowledge(move, game.nearby_mines(move))
+        latencies.append(time.perf_counter() - start)
+        sizes.append(len(ai.knowledge))
+        revealed += 1
+        if revealed == height * width - mines:
+            break
+
+    return {
+        "won": revealed == height * width - mines,
+        "latencies": latencies,
+        "sizes": sizes
+    }
+
+
+def _play(arguments):
+    return play(*arguments)
+
+
+def simulate(games, height=HEIGHT, width=WIDTH, mines=MINES, processes=None):
+    """
+    Plays `games` games seeded 0, 1, 2, ... across a process pool and
+    returns their results in seed order.
+    """
+    arguments = [(seed, height, width, mines) for seed in range(games)]
+    workers = processes or os.cpu_count() or 1
+    chunksize = max(1, games // (4 * workers))
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(_play, arguments, chunksize=chunksize))
+
+
+def report(results, seconds):
+    """
+    Prints win rate, throughput, move latency percentiles and the mean
+    knowledge base size as games go on.
+    """
+    games = len(results)
+    wins = sum(result["won"] for result in results)
+    latencies = [latency for result in results for latency in result["latencies"]]
+    moves = len(latencies)
+
+    print(f"Games: {games}")
+    print(f"Win rate: {wins / games:.1%} ({wins}/{games})")
+    print(f"Moves: {moves} in {seconds:.2f}s ({moves / seconds:.0f} moves/sec)")
+
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        print("Move latency: " + ", ".join(
+            f"p{p} {percentiles[p - 1] * 1000:.3f}ms" for p in (50, 90, 99)
+        ) + f", max {max(latencies) * 1000:.3f}ms")
+
+    # Mean size over the games that were still going at each move
+    longest = max((len(result["sizes"]) for result in results), default=0)
+    if longest:
+        print("Knowledge base size by move:")
+        step = max(1, longest // KB_SAMPLES)
+        for move in range(step, longest + 1, step):
+            sizes = [result["sizes"][move - 1] for result in results
+                     if len(result["sizes"]) >= move]
+            print(f"  move {move}: {statistics.mean(sizes):.1f} sentences"
+                  f" ({len(sizes)} games)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import html.parser
+import json
+import os
+import posixpath
+import random
+import re
+import sys
+import tempfile
+import time
+
+from crawler import parse, resolve, scan
+
+# Link pattern of the original crawl, for comparison
+ORIGINAL = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Workloads as (name, pages, links per page, filler words between links)
+CORPORA = [
+    ("small pages", 5000, 10, 20),
+    ("large pages", 200, 100, 200),
+    ("huge pages", 10, 100, 10000)
+]
+
+# Directories pages are spread across, besides the top of the corpus
+DIRECTORIES = ["", "a", "a/b", "c"]
+
+# Bytes fed to html.parser at a time
+CHUNK = 1 << 16
+
+SEED = 0
+
+
+def main():
+    if len(sys.argv) not in [1, 2]:
+        sys.exit("Usage: python benchmark.py [output.json]")
+
+    rng = random.Random(SEED)
+    results = []
+    for name, pages, links, words in CORPORA:
+        with tempfile.TemporaryDirectory() as directory:
+            expected = generate(directory, pages, links, words, rng)
+            for extractor in EXTRACTORS:
+                results.append(measure(name, extractor, directory, expected))
+
+    output = json.dumps(results, indent=2)
+    if len(sys.argv) == 2:
+        with open(sys.argv[1], "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+def generate(directory, pages, links, words, rng):
+    """
+    Writes a corpus of `pages` HTML pages spread across DIRECTORIES, each
+    with `links` links among `words` words of filler text per link, and
+    returns the pages each one links to.
+
+    Links are written relative to the page's own directory, with the
+    href in double quotes, single quotes or none, in upper or lower
+    case, among other attributes and sometimes with a fragment.
+    """
+    names = [
+        posixpath.join(rng.choice(DIRECTORIES), f"{i}.html") for i in range(pages)
+    ]
+    for name in DIRECTORIES:
+        os.makedirs(os.path.join(directory, name), exist_ok=True)
+    filler = " ".join(["lorem ipsum <b>dolor</b> sit amet"] * (words // 5))
+
+    expected = dict()
+    for name in names:
+        targets = set(rng.sample(names, min(links, pages))) - {name}
+        parts = ["<html><body>"]
+        for target in targets:
+            href = posixpath.relpath(target, posixpath.dirname(name) or ".")
+            if rng.random() < 0.2:
+                href += "#section"
+            quote = rng.choice(["\"", "'", ""])
+            tag = rng.choice(["a", "A"])
+            attribute = rng.choice(["href", "HREF"])
+            extra = rng.choice(["", " class=\"link\"", " title='x'"])
+            parts.append(f"<p>{filler}</p><{tag}{extra} {attribute}={quote}{href}{quote}>link</{tag}>")
+        parts.append("</body></html>")
+        with open(os.path.join(directory, name), "w") as f:
+            f.write("\n".join(parts))
+        expected[name] = targets
+    return expected
+
+
+def original(page, path, size):
+    """
+    Returns the links found by the original crawl's pattern.
+    """
+    with open(path, "rb") as f:
+        found = ORIGINAL.findall(f.read())
+    return {link.decode("utf-8", "replace") for link in found} - {page}
+
+
+class LinkParser(html.parser.HTMLParser):
+    """
+    Collects the href of every anchor tag fed to it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.found = set()
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for name, value in attrs:
+                if name == "href" and value is not None:
+                    self.found.add(value)
+
+
+def parse_html(page, path, size):
+    """
+    Returns the links found by html.parser, fed CHUNK bytes at a time.
+    """
+    parser = LinkParser()
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for chunk in iter(lambda: f.read(CHUNK), ""):
+            parser.feed(chunk)
+    parser.close()
+
+    directory = posixpath.dirname(page)
+    links = {resolve(directory, link) for link in parser.found} - {None}
+    return links - {page}
+
+
+# Each extractor returns the set of links in one file
+EXTRACTORS = {
+    "original": original,
+    "scanner": parse,
+    "html.parser": parse_html
+}
+
+
+def measure(name, extractor, directory, expected):
+    """
+    Runs one extractor over every file of a corpus, returning its
+    throughput and how many pages it found exactly the expected links on.
+    """
+    extract = EXTRACTORS[extractor]
+    files = list(scan(directory))
+    size = sum(file[2] for file in files)
+
+    start = time.perf_counter()
+    found = {page: extract(page, path, length) for page, path, length, _ in files}
+    seconds = time.perf_counter() - start
+
+    return {
+        "corpus": name,
+        "extractor": extractor,
+        "pages": len(files),
+        "megabytes": size / 1e6,
+        "seconds": seconds,
+        "megabytes_per_second": size / 1e6 / seconds,
+        "links": sum(len(links) for links in found.values()),
+        "expected_links": sum(len(links) for links in expected.values()),
+        "correct_pages": sum(found[page] == expected[page] for page in expected)
+    }
+
+
+if __name__ == "__main__":
+    main()
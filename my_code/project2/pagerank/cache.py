@@ -0,0 +1,145 @@
+import array
+import json
+import os
+import sys
+import time
+
+from crawler import parse_files, scan
+from graph import LinkGraph
+
+# Name of the cache file kept in each corpus directory
+CACHE = ".linkgraph"
+
+# Format written on the first line of every cache file
+VERSION = 2
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python cache.py corpus [processes]")
+    processes = int(sys.argv[2]) if len(sys.argv) == 3 else None
+
+    stats = dict()
+    start = time.perf_counter()
+    graph = load_graph(sys.argv[1], processes, stats)
+    print(f"Pages: {len(graph)}, links: {len(graph.indices)} "
+          f"in {time.perf_counter() - start:.2f}s")
+    print(f"Reused {stats['reused']} files, parsed {stats['parsed']}, "
+          f"removed {stats['removed']}")
+
+
+def read(filename):
+    """
+    Reads a cache file, returning None if it is missing, unreadable or
+    written in another format.
+
+    The first line is a JSON header holding the files with their sizes
+    and modification times, the names their links point to, the pages of
+    the graph and the length of each array. The arrays follow as raw
+    int64 values: each file's links as a CSR over the names, then the
+    graph itself.
+    """
+    try:
+        with open(filename, "rb") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != VERSION:
+                return None
+            arrays = dict()
+            for name, length in header["arrays"]:
+                arrays[name] = array.array("q")
+                arrays[name].fromfile(f, length)
+    except (OSError, ValueError, EOFError, KeyError):
+        return None
+    header.update(arrays)
+    return header
+
+
+def write(filename, cache):
+    """
+    Writes a cache file in the format read by `read`, replacing any
+    previous file only once the new one is complete.
+    """
+    names = ["links", "link_ptr", "indptr", "indices"]
+    header = {key: value for key, value in cache.items() if key not in names}
+    header["version"] = VERSION
+    header["arrays"] = [[name, len(cache[name])] for name in names]
+    temporary = filename + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n")
+        for name in names:
+            cache[name].tofile(f)
+    os.replace(temporary, filename)
+
+
+def load_graph(directory, processes=None, stats=None):
+    """
+    Returns the LinkGraph of the corpus in `directory`, using the cache
+    file kept there.
+
+    Files whose size and modification time match the cache keep their
+    cached links, and only new or changed files are parsed. When nothing
+    changed, the cached graph arrays are returned without rebuilding.
+    The cache is then rewritten, unless the directory is read-only.
+    If `stats` is given, it records how many files were reused, parsed
+    and removed.
+    """
+    filename = os.path.join(directory, CACHE)
+    cache = read(filename)
+    files = list(scan(directory))
+
+    # Cached links of every file still unchanged on disk
+    known = dict()
+    if cache is not None:
+        names = cache["names"]
+        links = cache["links"]
+        link_ptr = cache["link_ptr"]
+        for row, (page, size, mtime) in enumerate(cache["files"]):
+            known[page] = (size, mtime, row)
+    changed = [file for file in files
+               if known.get(file[0], (None, None, None))[:2] != (file[2], file[3])]
+    removed = len(known.keys() - {file[0] for file in files})
+
+    if stats is not None:
+        stats.update({
+            "reused": len(files) - len(changed),
+            "parsed": len(changed),
+            "removed": removed
+        })
+    if cache is not None and not changed and not removed:
+        return LinkGraph(cache["pages"], cache["indptr"], cache["indices"])
+
+    # Merge cached links with freshly parsed ones
+    parse = {file[0] for file in changed}
+    pairs = dict()
+    for page, _, _, _ in files:
+        if page not in parse:
+            row = known[page][2]
+            pairs[page] = [names[i] for i in links[link_ptr[row]:link_ptr[row + 1]]]
+    for page, parsed in parse_files(changed, processes):
+        pairs[page] = parsed
+    graph = LinkGraph.from_pairs(pairs.items())
+
+    # Store every file's links over a table of names
+    numbers = dict()
+    links = array.array("q")
+    link_ptr = array.array("q", [0])
+    for page, _, _, _ in files:
+        links.fromlist([numbers.setdefault(link, len(numbers)) for link in pairs[page]])
+        link_ptr.append(len(links))
+    try:
+        write(filename, {
+            "files": [[page, size, mtime] for page, _, size, mtime in files],
+            "names": list(numbers),
+            "pages": graph.pages,
+            "links": links,
+            "link_ptr": link_ptr,
+            "indptr": graph.indptr,
+            "indices": graph.indices
+        })
+    except OSError:
+        pass
+    return graph
+
+
+if __name__ == "__main__":
+    main()
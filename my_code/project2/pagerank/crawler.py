@@ -0,0 +1,187 @@
+import collections
+import concurrent.futures
+import functools
+import html
+import itertools
+import mmap
+import os
+import posixpath
+import re
+import sys
+import time
+import urllib.parse
+
+from graph import LinkGraph
+
+# Links in anchor tags, over raw bytes, with the href value in double
+# quotes, single quotes or no quotes at all
+LINK = re.compile(
+    rb"""<a\s(?:[^>]*?\s)?href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'<>`]+))""",
+    re.IGNORECASE
+)
+
+# Links naming a file in the same directory, which need no resolving
+PLAIN = re.compile(r"[^&#?:%/\s.][^&#?:%/\s]*")
+
+# Distinct (directory, link) pairs remembered by `resolve`
+RESOLVE_CACHE_SIZE = 1 << 16
+
+# Files at least this large are memory-mapped instead of read
+MMAP_THRESHOLD = 1 << 20
+
+# Files parsed per task sent to a worker process
+BATCH = 256
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python crawler.py directory [processes]")
+    processes = int(sys.argv[2]) if len(sys.argv) == 3 else None
+
+    stats = dict()
+    graph = LinkGraph.from_pairs(crawl_pairs(sys.argv[1], processes, stats))
+    print(f"Pages: {len(graph)}, links: {len(graph.indices)}")
+    print(f"Read {stats['pages']} files, {stats['bytes'] / 1e6:.1f} MB "
+          f"in {stats['seconds']:.2f}s ({stats['pages_per_second']:.0f} pages/sec, "
+          f"{stats['megabytes_per_second']:.1f} MB/sec)")
+
+
+def scan(directory):
+    """
+    Yields (page, path, size, mtime) for every HTML file under
+    `directory`, searching subdirectories with an explicit stack of
+    os.scandir calls. `mtime` is the modification time in nanoseconds.
+    Pages are named by their path relative to `directory`, with "/"
+    between directories.
+    """
+    stack = [""]
+    while stack:
+        prefix = stack.pop()
+        with os.scandir(os.path.join(directory, prefix)) as entries:
+            for entry in entries:
+                name = prefix + entry.name
+                if entry.is_dir():
+                    stack.append(name + "/")
+                elif entry.name.endswith(".html") and entry.is_file():
+                    stat = entry.stat()
+                    yield name, entry.path, stat.st_size, stat.st_mtime_ns
+
+
+def parse(page, path, size):
+    """
+    Returns the set of pages linked to by the file at `path`, other than
+    `page` itself, resolving each link with `resolve`. Large files are
+    searched through a memory map rather than read into memory.
+    """
+    with open(path, "rb") as f:
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+                found = LINK.findall(contents)
+        else:
+            found = LINK.findall(f.read())
+
+    # Only one of the three groups matches; each distinct link is resolved once
+    directory = posixpath.dirname(page)
+    links = set()
+    for link in set(map(b"".join, found)):
+        link = resolve(directory, link.decode("utf-8", "replace"))
+        if link is not None:
+            links.add(link)
+    links.discard(page)
+    return links
+
+
+@functools.lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def resolve(directory, link):
+    """
+    Returns the page named by `link`, found on a page in `directory`, or
+    None if it cannot be a page in the corpus. Links are relative to
+    `directory` unless they start with "/", which is the top of the
+    corpus. Fragments and queries are dropped, and links with a scheme,
+    such as "https:" or "mailto:", are ignored.
+    """
+    if PLAIN.fullmatch(link):
+        return directory + "/" + link if directory else link
+    if "&" in link:
+        link = html.unescape(link)
+    link = link.strip().split("#", 1)[0].split("?", 1)[0]
+    if not link or ":" in link.split("/", 1)[0]:
+        return None
+    if "%" in link:
+        link = urllib.parse.unquote(link)
+    if link.startswith("/"):
+        link = link.lstrip("/")
+    elif directory:
+        link = directory + "/" + link
+    link = posixpath.normpath(link)
+    if link == ".." or link.startswith("../"):
+        return None
+    return link
+
+
+def parse_batch(batch):
+    """
+    Parses a list of files as yielded by `scan`, returning (page, links)
+    pairs in the same order.
+    """
+    return [(page, parse(page, path, size)) for page, path, size, _ in batch]
+
+
+def crawl_pairs(directory, processes=None, stats=None):
+    """
+    Yields (page, links) for every HTML file under `directory`.
+    See `parse_files`.
+    """
+    return parse_files(scan(directory), processes, stats)
+
+
+def parse_files(files, processes=None, stats=None):
+    """
+    Yields (page, links) for every file in `files`, as yielded by `scan`.
+
+    Files are parsed in batches across a process pool, keeping only a few
+    batches in flight at a time, so pairs stream out while the directory
+    is still being scanned. No more than one batch of files is parsed in
+    this process. If `stats` is given, it is filled in with the number of
+    pages and bytes read and the throughput achieved.
+    """
+    start = time.perf_counter()
+    files = iter(files)
+    batches = iter(lambda: list(itertools.islice(files, BATCH)), [])
+    first = next(batches, [])
+    second = next(batches, [])
+    batches = itertools.chain([first, second] if second else [first], batches)
+    pages = 0
+    size = 0
+
+    if not second or processes == 1:
+        for batch in batches:
+            size += sum(file[2] for file in batch)
+            pages += len(batch)
+            yield from parse_batch(batch)
+    else:
+        workers = processes or os.cpu_count() or 1
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            pending = collections.deque()
+            for batch in batches:
+                size += sum(file[2] for file in batch)
+                pages += len(batch)
+                pending.append(executor.submit(parse_batch, batch))
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    if stats is not None:
+        seconds = time.perf_counter() - start
+        stats.update({
+            "pages": pages,
+            "bytes": size,
+            "seconds": seconds,
+            "pages_per_second": pages / seconds if seconds else 0.0,
+            "megabytes_per_second": size / 1e6 / seconds if seconds else 0.0
+        })
+
+
+if __name__ == "__main__":
+    main()
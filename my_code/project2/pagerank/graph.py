@@ -0,0 +1,321 @@
+import array
+import random
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import scipy.sparse
+    import scipy.sparse.linalg
+except ImportError:
+    scipy = None
+
+# Ways to solve for the PageRank vector, see `power_iteration`
+SOLVERS = ["jacobi", "gauss-seidel", "aitken"]
+
+# Iterations between Aitken extrapolations
+EXTRAPOLATE = 10
+
+
+class LinkGraph():
+    """
+    Corpus stored in compressed sparse row (CSR) form.
+
+    Pages are numbered in sorted order. The pages linked to by page i are
+    indices[indptr[i]:indptr[i + 1]], so the whole graph takes two flat
+    integer arrays instead of a set per page.
+    """
+
+    def __init__(self, pages, indptr, indices):
+        self.pages = pages
+        self.index = {page: i for i, page in enumerate(pages)}
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Builds a graph from a dict mapping each page to the pages it
+        links to. Links to pages outside the corpus are dropped.
+        """
+        return cls.from_pairs(corpus.items())
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """
+        Builds a graph from (page, links) pairs, such as those streamed
+        by a crawler, in a single pass. Names are numbered as they are
+        first seen and links are kept as flat arrays of numbers, so only
+        the names themselves are held as strings. Links to names that
+        never appear as a page are dropped.
+        """
+        numbers = dict()
+        rows = dict()
+        targets = array.array("q")
+        offsets = array.array("q", [0])
+
+        for page, links in pairs:
+            rows[page] = len(offsets) - 1
+            numbers.setdefault(page, len(numbers))
+            targets.fromlist([numbers.setdefault(link, len(numbers)) for link in links])
+            offsets.append(len(targets))
+
+        # Renumber pages in sorted order, with -1 for names that are not pages
+        pages = sorted(rows)
+        renumber = array.array("q", [-1]) * len(numbers)
+        for i, page in enumerate(pages):
+            renumber[numbers[page]] = i
+
+        # Copy each page's links in the new order, sorted
+        indptr = array.array("q", [0])
+        indices = array.array("q")
+        for page in pages:
+            row = rows[page]
+            links = [renumber[target] for target in targets[offsets[row]:offsets[row + 1]]]
+            links = [target for target in links if target >= 0]
+            links.sort()
+            indices.fromlist(links)
+            indptr.append(len(indices))
+        return cls(pages, indptr, indices)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def change(self, added=None, removed=None):
+        """
+        Returns a new graph with the links in `added` and without the
+        links in `removed`, both dicts mapping a page to a set of the
+        pages it links to. Pages in `added` that are not in the graph are
+        created, and pages mapped to None in `removed` are deleted along
+        with every link to them. Removals apply before additions.
+
+        Only the changed pages' links are looked up by name. Every other
+        row is renumbered, or copied as it is when no page was created
+        or deleted.
+        """
+        added = added or dict()
+        removed = removed or dict()
+        deleted = {page for page, links in removed.items() if links is None}
+        pages = sorted((self.index.keys() - deleted) | added.keys())
+        index = {page: i for i, page in enumerate(pages)}
+        same = len(pages) == len(self.pages) and not deleted
+
+        # Old page numbers in the new order, with -1 for deleted pages
+        renumber = [index.get(page, -1) for page in self.pages]
+
+        indptr = array.array("q", [0])
+        indices = array.array("q")
+        for page in pages:
+            old = self.index.get(page)
+            if page in added or page in removed:
+                links = set() if old is None or page in deleted else {
+                    self.pages[j] for j in self.links(old)
+                }
+                links = (links - set(removed.get(page) or ())) | set(added.get(page, ()))
+                indices.fromlist(sorted(index[link] for link in links if link in index))
+            elif same:
+                indices.extend(self.links(old))
+            else:
+                row = [renumber[j] for j in self.links(old)]
+                indices.fromlist([j for j in row if j >= 0])
+            indptr.append(len(indices))
+        return LinkGraph(pages, indptr, indices)
+
+    def links(self, i):
+        """
+        Returns the indices of the pages linked to by page i.
+        """
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def to_corpus(self):
+        """
+        Returns the graph as a dict mapping each page to a set of the
+        pages it links to.
+        """
+        return {
+            page: {self.pages[j] for j in self.links(i)}
+            for i, page in enumerate(self.pages)
+        }
+
+    def ranks(self, vector):
+        """
+        Returns a dict mapping each page to its entry in `vector`.
+        """
+        return {page: float(vector[i]) for i, page in enumerate(self.pages)}
+
+
+def sample(graph, damping_factor, n, rng=random):
+    """
+    Returns how many times each page is visited by a random surfer taking
+    `n` samples, starting from a page chosen at random.
+
+    Each step draws a single random number u. If u < `damping_factor` and
+    the page has links, u picks one of its links; otherwise the surfer
+    teleports to a page picked by u, so every step takes constant time.
+    """
+    pages = len(graph)
+    indptr = graph.indptr
+    indices = graph.indices
+    draw = rng.random
+    counts = [0] * pages
+
+    page = min(int(draw() * pages), pages - 1)
+    counts[page] += 1
+    for _ in range(n - 1):
+        u = draw()
+        start = indptr[page]
+        degree = indptr[page + 1] - start
+        if degree and u < damping_factor:
+            page = indices[start + min(int(u / damping_factor * degree), degree - 1)]
+        elif degree:
+            page = min(int((u - damping_factor) / (1 - damping_factor) * pages), pages - 1)
+        else:
+            page = min(int(u * pages), pages - 1)
+        counts[page] += 1
+    return counts
+
+
+def power_iteration(graph, damping_factor, accuracy, start=None,
+                    solver="jacobi", tolerance=None, stats=None):
+    """
+    Returns the PageRank vector of `graph`, iterating from `start`, or
+    the uniform distribution if not given, until no page changes by more
+    than `accuracy`, or, if `tolerance` is given, until the ranks change
+    by at most `tolerance` in total (the L1 norm of the residual).
+
+    `solver` is one of SOLVERS:
+    - "jacobi" computes every new rank from the previous iteration's.
+    - "gauss-seidel" solves for ranks in page order, using the ranks
+      already updated in the same sweep. Needs scipy.
+    - "aitken" is "jacobi", extrapolated from its last three iterates
+      every EXTRAPOLATE iterations.
+    If `stats` is given, it records the iterations taken and the final
+    residual.
+
+    Needs numpy. The link matrix is built once, as a scipy sparse matrix
+    if scipy is installed, or else applied with numpy.bincount. Pages
+    without links are treated as linking to every page, which is added as
+    a single term spreading their total rank evenly, rather than by
+    storing all those links.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"unknown solver {solver}")
+    if solver == "gauss-seidel" and scipy is None:
+        raise ValueError("gauss-seidel needs scipy")
+    n = len(graph)
+    indptr = numpy.frombuffer(graph.indptr, dtype=numpy.int64)
+    indices = numpy.frombuffer(graph.indices, dtype=numpy.int64)
+    degrees = numpy.diff(indptr)
+    dangling = degrees == 0
+    weights = numpy.zeros(n)
+    weights[~dangling] = 1 / degrees[~dangling]
+
+    if scipy is not None:
+
+        # Entry (j, i) is the chance of following a link from i to j
+        matrix = scipy.sparse.csr_matrix(
+            (numpy.repeat(weights, degrees), indices, indptr), shape=(n, n)
+        ).T.tocsr()
+
+        def follow(rank):
+            return matrix @ rank
+    else:
+        sources = numpy.repeat(numpy.arange(n), degrees)
+
+        def follow(rank):
+            return numpy.bincount(indices, weights=(rank * weights)[sources], minlength=n)
+
+    def step(rank):
+        return (1 - damping_factor) / n + damping_factor * (
+            follow(rank) + rank[dangling].sum() / n
+        )
+
+    if start is None:
+        rank = numpy.full(n, 1 / n)
+    else:
+        rank = numpy.asarray(start, dtype=float)
+    if solver == "gauss-seidel":
+        return gauss_seidel(matrix, dangling, damping_factor, accuracy, rank,
+                            tolerance, stats)
+
+    previous = None
+    iterations = 0
+    while True:
+        new = step(rank)
+        iterations += 1
+        change = numpy.abs(new - rank)
+
+        # Keep an extrapolation only if it is closer to the fixed point
+        if solver == "aitken" and previous is not None and iterations % EXTRAPOLATE == 0:
+            guess = extrapolate(previous, rank, new)
+            guess_new = step(guess)
+            iterations += 1
+            guess_change = numpy.abs(guess_new - guess)
+            if guess_change.sum() < change.sum():
+                rank, new, change = guess, guess_new, guess_change
+        residual = change.sum()
+        if change.max() <= accuracy if tolerance is None else residual <= tolerance:
+            break
+        previous = rank
+        rank = new
+
+    if stats is not None:
+        stats["iterations"] = iterations
+        stats["residual"] = float(residual)
+    return new / new.sum()
+
+
+def gauss_seidel(matrix, dangling, damping_factor, accuracy, rank, tolerance, stats):
+    """
+    Returns the PageRank vector for `power_iteration` by Gauss-Seidel
+    sweeps, solving for ranks in page order so each page uses the ranks
+    already updated in the same sweep.
+
+    Each sweep is one triangular solve. Pages without links contribute
+    their total rank from the start of the sweep. A sweep does not keep
+    the total at 1, so the ranks are rescaled after every sweep, and
+    changes are measured after rescaling.
+    """
+    n = len(rank)
+    lower = (
+        scipy.sparse.identity(n, format="csr")
+        - damping_factor * scipy.sparse.tril(matrix, format="csr")
+    ).tocsr()
+    upper = damping_factor * scipy.sparse.triu(matrix, k=1, format="csr")
+
+    rank = rank / rank.sum()
+    iterations = 0
+    while True:
+        constant = (1 - damping_factor + damping_factor * rank[dangling].sum()) / n
+        new = scipy.sparse.linalg.spsolve_triangular(
+            lower, constant + upper @ rank, lower=True
+        )
+        iterations += 1
+        new /= new.sum()
+        change = numpy.abs(new - rank)
+        residual = change.sum()
+        if change.max() <= accuracy if tolerance is None else residual <= tolerance:
+            break
+        rank = new
+
+    if stats is not None:
+        stats["iterations"] = iterations
+        stats["residual"] = float(residual)
+    return new
+
+
+def extrapolate(first, second, third):
+    """
+    Returns the Aitken extrapolation of three successive iterates,
+    which removes the slowest decaying error term from each page's rank.
+    Pages whose rank is not converging steadily keep their latest value.
+    """
+    step = second - first
+    curve = third - 2 * second + first
+    steady = numpy.abs(curve) > 1e-15
+    rank = third.copy()
+    rank[steady] = first[steady] - step[steady] ** 2 / curve[steady]
+    rank = numpy.maximum(rank, 0)
+    return rank / rank.sum()
@@ -0,0 +1,144 @@
+import concurrent.futures
+import sys
+
+import numpy
+
+from pagerank import DAMPING, crawl
+from graph import LinkGraph
+
+# Total samples taken by default
+SAMPLES = 1000000
+
+# Surfers moved together in one batch
+WALKERS = 4096
+
+# Independent batches, whose spread gives the error estimate
+BATCHES = 8
+
+# Fewest steps each surfer takes before finishing its last segment
+MIN_STEPS = 64
+
+# Most visits recorded before they are counted
+BLOCK = 1 << 20
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python montecarlo.py corpus [samples] [processes]")
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else SAMPLES
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    graph = LinkGraph.from_corpus(crawl(sys.argv[1]))
+    ranks, error = monte_carlo_pagerank(graph, DAMPING, samples, processes=processes)
+    print(f"PageRank Results from {error['samples']} Samples "
+          f"(max standard error {error['max_standard_error']:.4f})")
+    for page, rank in sorted(graph.ranks(ranks).items()):
+        print(f"  {page}: {rank:.4f}")
+
+
+def walk(indptr, indices, damping_factor, walkers, steps, seed):
+    """
+    Moves `walkers` random surfers together for `steps` steps, starting
+    from uniformly random pages, and returns how many times each page
+    was visited. Positions are numpy index arrays: each step draws a
+    teleport mask and a link offset for every surfer at once.
+
+    A teleport lands on a uniformly random page, just like the start, so
+    each surfer's path splits into independent segments from one teleport
+    to the next. Cutting paths off after `steps` would undercount the end
+    of the last segment, so surfers keep walking, only until they next
+    teleport, and every counted segment is complete.
+    """
+    n = len(indptr) - 1
+    degrees = numpy.diff(indptr)
+    rng = numpy.random.default_rng(seed)
+    counts = numpy.zeros(n, dtype=numpy.int64)
+
+    def move(position):
+        """Returns the surfers' next pages, and which ones followed a link."""
+        size = len(position)
+        degree = degrees[position]
+        follow = (rng.random(size) < damping_factor) & (degree > 0)
+        offset = (rng.random(size) * degree).astype(numpy.int64)
+        offset = numpy.minimum(offset, numpy.maximum(degree - 1, 0))
+        position = numpy.where(
+            follow,
+            indices[numpy.minimum(indptr[position] + offset, len(indices) - 1)],
+            rng.integers(n, size=size)
+        )
+        return position, follow
+
+    # Record positions a block at a time, then count the whole block
+    rows = max(1, BLOCK // walkers)
+    visits = numpy.empty((rows, walkers), dtype=numpy.int64)
+    position = rng.integers(n, size=walkers)
+    for step in range(steps):
+        if step:
+            position, _ = move(position)
+        visits[step % rows] = position
+        if step % rows == rows - 1 or step == steps - 1:
+            counts += numpy.bincount(visits[:step % rows + 1].ravel(), minlength=n)
+
+    # Finish every surfer's last segment
+    while len(position):
+        position, follow = move(position)
+        position = position[follow]
+        counts += numpy.bincount(position, minlength=n)
+    return counts
+
+
+def _walk(arguments):
+    return walk(*arguments)
+
+
+def monte_carlo_pagerank(graph, damping_factor, samples, walkers=WALKERS,
+                         batches=BATCHES, processes=1, seed=None):
+    """
+    Estimates PageRank by running `batches` independent batches of
+    `walkers` surfers, splitting `samples` visits between them, across a
+    process pool if `processes` is more than 1. Every batch gets its own
+    seed spawned from `seed`.
+
+    Finishing each surfer's last segment adds up to damping_factor /
+    (1 - damping_factor) visits per surfer on average, fewer when pages
+    without links end segments early. That many steps are taken off each
+    surfer's walk, so the visits counted come close to `samples` without
+    going over it on average. When `samples` is too small for every
+    surfer to walk MIN_STEPS steps, fewer surfers are used.
+
+    Returns the rank vector and a convergence estimate: the number of
+    visits counted, and the largest and total standard error of
+    the page ranks, measured from how much the batches disagree.
+    """
+    tail = damping_factor / (1 - damping_factor) if damping_factor < 1 else 0
+    walkers = max(1, min(walkers, int(samples / (batches * (MIN_STEPS + tail)))))
+    steps = max(1, round(samples / (walkers * batches) - tail))
+    indptr = numpy.frombuffer(graph.indptr, dtype=numpy.int64)
+    indices = numpy.frombuffer(graph.indices, dtype=numpy.int64)
+    if not len(indices):
+        indices = numpy.zeros(1, dtype=numpy.int64)
+    seeds = numpy.random.SeedSequence(seed).spawn(batches)
+    arguments = [(indptr, indices, damping_factor, walkers, steps, s) for s in seeds]
+
+    if processes > 1:
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            counts = list(executor.map(_walk, arguments))
+    else:
+        counts = [walk(*a) for a in arguments]
+
+    counts = numpy.array(counts)
+    estimates = counts / counts.sum(axis=1, keepdims=True)
+    ranks = estimates.mean(axis=0)
+    if batches > 1:
+        error = estimates.std(axis=0, ddof=1) / numpy.sqrt(batches)
+    else:
+        error = numpy.full(len(graph), numpy.nan)
+    return ranks, {
+        "samples": int(counts.sum()),
+        "max_standard_error": float(error.max()),
+        "total_standard_error": float(error.sum())
+    }
+
+
+if __name__ == "__main__":
+    main()
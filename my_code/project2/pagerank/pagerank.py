@@ -1,16 +1,30 @@
-import os
-import random
-import re
 import sys
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import scipy
+except ImportError:
+    scipy = None
+
+from cache import load_graph
+from crawler import crawl_pairs
+from graph import EXTRAPOLATE, SOLVERS, LinkGraph, power_iteration, sample
+
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Largest change in any page's rank at which iteration stops
+ACCURACY = 0.001
+
 
 def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    corpus = load_graph(sys.argv[1])
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
@@ -27,16 +41,8 @@ def crawl(directory):
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
     """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+    # Extract all links from HTML files, including those in subdirectories
+    pages = dict(crawl_pairs(directory))
 
     # Only include links to other pages in the corpus
     for filename in pages:
@@ -98,6 +104,15 @@ def transition_model(corpus, page, damping_factor):
     raise NotImplementedError
 
 
+def as_graph(corpus):
+    """
+    Returns `corpus` as a LinkGraph, which it may already be.
+    """
+    if isinstance(corpus, LinkGraph):
+        return corpus
+    return LinkGraph.from_corpus(corpus)
+
+
 def sample_pagerank(corpus, damping_factor, n):
     """
     Return PageRank values for each page by sampling `n` pages
@@ -106,42 +121,17 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    `corpus` may also be a LinkGraph, such as one loaded from the cache.
     """
-    # Construct a dict for recording how many times a certain page has been browsed
-    record = dict()
-    
-    # Construct a dict of possibility of first pick
-    poss = dict()
-    
-    page_count = len(corpus)
-    for k in corpus:
-        # Possibility of first pick
-        poss[k] = 1 / page_count
-        
-        # Initialize record
-        record[k] = 0
-    
-    # Arbitrarily pick one page to start
-    start = random_pick(poss)
-    record[start] += 1
-    
-    # Loop n-1 times for sampling
-    for i in range(n - 1):
-        poss = transition_model(corpus, start, damping_factor)
-        start = random_pick(poss)
-        record[start] += 1
-        
-    # Construct rank
-    rank = dict()
-    for k, v in record.items():
-        rank[k] = v / n
-    
-    return rank
-    
-    raise NotImplementedError
+    # Walk the link graph, taking constant time per sample
+    graph = as_graph(corpus)
+    counts = sample(graph, damping_factor, n)
+    return graph.ranks([count / n for count in counts])
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, solver="jacobi", tolerance=None,
+                     stats=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -149,17 +139,36 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    `corpus` may also be a LinkGraph, such as one loaded from the cache.
+    `solver` is one of SOLVERS, see `power_iteration`. Iteration stops
+    once no PageRank value changes by more than ACCURACY, or, if
+    `tolerance` is given, once they change by at most `tolerance` in
+    total. If `stats` is given, it records the iterations taken.
     """
-    # Deal with problem that a page has no links
-    allPages = set(corpus.keys())
+    if solver not in SOLVERS:
+        raise ValueError(f"unknown solver {solver}")
+    if not len(corpus):
+        if stats is not None:
+            stats["iterations"] = 0
+            stats["residual"] = 0.0
+        return dict()
+
+    # Iterate on a sparse link matrix when numpy is available
+    if numpy is not None and (solver != "gauss-seidel" or scipy is not None):
+        graph = as_graph(corpus)
+        return graph.ranks(power_iteration(graph, damping_factor, ACCURACY, solver=solver,
+                                           tolerance=tolerance, stats=stats))
+    if isinstance(corpus, LinkGraph):
+        corpus = corpus.to_corpus()
     
-    for page in corpus:
-        if len(corpus[page]) == 0:
-            corpus[page] = allPages
+    # Pages without links are treated as linking to every page, by
+    # spreading their total rank evenly rather than by storing those links
+    dangling = set(page for page in corpus if len(corpus[page]) == 0)
     
     # Parse pages' father page
-    fatherPages = corpus.copy()
-    for k in fatherPages:
+    fatherPages = dict()
+    for k in corpus:
         fatherPages[k] = set()
     
     for k in corpus:
@@ -173,48 +182,128 @@ def iterate_pagerank(corpus, damping_factor):
     for k in corpus:
         rank[k] = 1 / page_count
     
-    # Iterate rank until their change is less then 0.001
-    ACCURACY = 0.001
-    flag = True
-    
-    while(flag):
-        flag = False
-        oldRank = rank.copy()
-        
-        for k in oldRank:
-            # Calculate sum of (PR(i) / NumLinks(i))
-            tempSum = 0
-            for fatherPage in fatherPages[k]:
-                tempSum += oldRank[fatherPage] / len(corpus[fatherPage])
-            
-            # Calculate PR(p)
-            rank[k] = (1 - damping_factor) / page_count + damping_factor * tempSum
-                    
-            # See if PR changes more than 0.001, if YES, then loop
-            if abs(rank[k] - oldRank[k]) > ACCURACY:
-                flag = True
-    
-    return rank
+    # Iterate rank until their change is small enough
+    previous = None
+    iterations = 0
+
+    while True:
+        newRank, change = update_rank(corpus, fatherPages, dangling, rank,
+                                      damping_factor, solver == "gauss-seidel")
+        iterations += 1
+
+        # Keep an extrapolation only if it is closer to the fixed point
+        if solver == "aitken" and previous is not None and iterations % EXTRAPOLATE == 0:
+            guess = extrapolate_rank(previous, rank, newRank)
+            guessRank, guessChange = update_rank(corpus, fatherPages, dangling, guess,
+                                                 damping_factor, False)
+            iterations += 1
+            if sum(guessChange.values()) < sum(change.values()):
+                rank, newRank, change = guess, guessRank, guessChange
+
+        if tolerance is None:
+            if max(change.values()) <= ACCURACY:
+                break
+        elif sum(change.values()) <= tolerance:
+            break
+        previous = rank
+        rank = newRank
+
+    if stats is not None:
+        stats["iterations"] = iterations
+        stats["residual"] = sum(change.values())
+    total = sum(newRank.values())
+    return {k: newRank[k] / total for k in newRank}
     
     raise NotImplementedError
 
-def random_pick(possibility_dict):
-    # Construct a list consist of tuple of (keyname, pstart, pend) for random pick
-    possibility_list = list()
-    p = 0
-    for k, v in possibility_dict.items():
-        possibility_list.append((k, p, p+v))
-        p += v
-
-    # Produce a number ranging in [0, 1)    
-    random.seed()
-    num = random.random()
-    
-    # See which range the num falls in
-    for i in range(len(possibility_list)):
-        if num >= possibility_list[i][1] and num < possibility_list[i][2]:
-            return possibility_list[i][0]
-    
+
+def update_rank(corpus, fatherPages, dangling, rank, damping_factor, in_place):
+    """
+    Return the next PageRank values after `rank`, and how much each one
+    changed. If `in_place` is true, `rank` itself is updated page by
+    page, so later pages already use the new values of earlier ones.
+    A sweep like that does not keep the total at 1, so the values are
+    rescaled afterwards, and changes are measured after rescaling.
+
+    The pages in `dangling` have no links, and their total rank is
+    shared by every page.
+    """
+    newRank = rank if in_place else dict()
+    change = dict()
+    page_count = len(corpus)
+    danglingSum = sum(rank[page] for page in dangling)
+    if in_place:
+        before = dict(rank)
+
+    for k in corpus:
+        # Calculate sum of (PR(i) / NumLinks(i))
+        tempSum = danglingSum / page_count
+        for fatherPage in fatherPages[k]:
+            tempSum += rank[fatherPage] / len(corpus[fatherPage])
+
+        # Calculate PR(p)
+        value = (1 - damping_factor) / page_count + damping_factor * tempSum
+        change[k] = abs(value - rank[k])
+        if in_place and k in dangling:
+            danglingSum += value - rank[k]
+        newRank[k] = value
+
+    if in_place:
+        total = sum(newRank.values())
+        for k in newRank:
+            newRank[k] /= total
+            change[k] = abs(newRank[k] - before[k])
+    return newRank, change
+
+
+def extrapolate_rank(first, second, third):
+    """
+    Return the Aitken extrapolation of three successive PageRank
+    dictionaries. See `graph.extrapolate`.
+    """
+    rank = dict()
+    for k in third:
+        curve = third[k] - 2 * second[k] + first[k]
+        if abs(curve) > 1e-15:
+            rank[k] = max(first[k] - (second[k] - first[k]) ** 2 / curve, 0)
+        else:
+            rank[k] = third[k]
+    total = sum(rank.values())
+    return {k: rank[k] / total for k in rank}
+
+
+def update_pagerank(corpus, ranks, damping_factor, added=None, removed=None,
+                    solver="jacobi", tolerance=None, stats=None):
+    """
+    Return the changed corpus as a LinkGraph, and its PageRank values,
+    after the links in `added` are added and those in `removed` removed.
+
+    `ranks` are the PageRank values before the change, as returned by
+    `iterate_pagerank`. `added` and `removed` map pages to sets of links;
+    new pages in `added` are created, and pages mapped to None in
+    `removed` are deleted. See `LinkGraph.change`.
+
+    Iteration starts from the previous values rather than from the
+    uniform distribution, so a small change converges in a few
+    iterations. New pages start at (1 - damping_factor) / N.
+    `solver`, `tolerance` and `stats` are as for `iterate_pagerank`.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"unknown solver {solver}")
+    graph = as_graph(corpus).change(added, removed)
+    if numpy is None or not len(graph) or (solver == "gauss-seidel" and scipy is None):
+        return graph, iterate_pagerank(graph, damping_factor, solver, tolerance, stats)
+
+    # Start from the old values, rescaled to sum to 1
+    page_count = len(graph)
+    start = numpy.array([
+        ranks.get(page, (1 - damping_factor) / page_count) for page in graph.pages
+    ])
+    start /= start.sum()
+    return graph, graph.ranks(power_iteration(graph, damping_factor, ACCURACY, start,
+                                              solver=solver, tolerance=tolerance,
+                                              stats=stats))
+
 """def test():
     dict1 = {"a": [1], "b": [2], "c": [3]}
     dict2 = dict1.copy()
@@ -0,0 +1,106 @@
+import collections
+import heapq
+import sys
+import time
+
+from cache import load_graph
+from pagerank import DAMPING
+
+# Residual per link left unpushed at each page
+EPSILON = 1e-5
+
+# Pages listed by default
+TOP = 10
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python personalized.py corpus seed [seed ...]")
+    graph = load_graph(sys.argv[1])
+    seeds = sys.argv[2:]
+    for seed in seeds:
+        if seed not in graph.index:
+            sys.exit(f"Unknown page {seed}")
+
+    stats = dict()
+    start = time.perf_counter()
+    pages = top_pages(graph, seeds, DAMPING, TOP, stats=stats)
+    print(f"Personalized PageRank Results for {', '.join(seeds)} "
+          f"in {(time.perf_counter() - start) * 1000:.1f}ms "
+          f"({stats['pushes']} pushes, error at most {stats['error']:.1e})")
+    for page, rank in pages:
+        print(f"  {page}: {rank:.4f}")
+
+
+def personalized_pagerank(graph, seeds, damping_factor, epsilon=EPSILON, stats=None):
+    """
+    Returns approximate PageRank values for a surfer who teleports to a
+    page chosen at random from `seeds` instead of from every page, as a
+    dict holding only the pages reached. Pages without links also lead
+    back to the seeds.
+
+    Uses forward push (Andersen, Chung and Lang): every page holds a
+    value and a residual, starting with the seeds' teleport chances as
+    residuals. Pushing a page keeps 1 - `damping_factor` of its residual
+    as value and spreads the rest across its links, so only pages near
+    the seeds are ever touched. Pages are pushed until every residual is
+    below `epsilon` times the page's number of links.
+
+    If `stats` is given, it records the number of pushes and the error
+    bound, the residual left over, which is the most that all values
+    together can be below the exact ones.
+    """
+    indptr = graph.indptr
+    indices = graph.indices
+    teleport = 1 - damping_factor
+    start = {graph.index[seed]: 1 / len(set(seeds)) for seed in seeds}
+
+    value = dict()
+    residual = dict(start)
+    queue = collections.deque(start)
+    queued = set(start)
+    pushes = 0
+
+    while queue:
+        page = queue.popleft()
+        queued.discard(page)
+        mass = residual.pop(page)
+        value[page] = value.get(page, 0) + teleport * mass
+        pushes += 1
+
+        # Spread the rest across the page's links, or back to the seeds
+        first = indptr[page]
+        degree = indptr[page + 1] - first
+        if degree:
+            targets = indices[first:first + degree]
+            share = damping_factor * mass / degree
+        else:
+            targets = start
+            share = damping_factor * mass / len(start)
+        for target in targets:
+            total = residual.get(target, 0) + share
+            residual[target] = total
+            if target not in queued and total >= epsilon * max(
+                indptr[target + 1] - indptr[target], 1
+            ):
+                queue.append(target)
+                queued.add(target)
+
+    if stats is not None:
+        stats["pushes"] = pushes
+        stats["error"] = sum(residual.values())
+    return {graph.pages[page]: rank for page, rank in value.items()}
+
+
+def top_pages(graph, seeds, damping_factor, k=TOP, epsilon=EPSILON, stats=None):
+    """
+    Returns the `k` pages with the highest personalized PageRank for
+    `seeds`, as (page, rank) pairs from highest to lowest.
+    See `personalized_pagerank`.
+    """
+    ranks = personalized_pagerank(graph, seeds, damping_factor, epsilon, stats)
+    return heapq.nlargest(k, ranks.items(), key=lambda item: item[1])
+
+
+if __name__ == "__main__":
+    main()